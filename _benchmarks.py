@@ -0,0 +1,149 @@
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import time as _time
+
+
+def benchmark_us_cleaning(paths, repeat=3):
+    """
+    Compare the precompiled US bill cleaning (UnitedStates.clean) against the original cleaning path
+    (UnitedStates.clean_legacy) on saved bills, checking that both produce the same text.
+
+    :param paths: paths to scraped US bill JSON files (Legislation/UnitedStates/Annual/*.json).
+    :param repeat: number of timing runs per bill; the fastest is kept.
+    :return: dictionary of total seconds per implementation.
+    """
+    from _country_parsers_annual import UnitedStates
+
+    totals = {'clean': 0., 'clean_legacy': 0.}
+    n_bytes = 0
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            html = _json.loads(f.read())['html']
+
+        if not html:
+            continue
+
+        n_bytes += len(html)
+
+        for name in totals:
+            function = getattr(UnitedStates, name)
+            totals[name] += min(_time_call(function, html) for _ in range(repeat))
+
+        if UnitedStates.clean(html)[0] != UnitedStates.clean_legacy(html)[0]:
+            print('Output mismatch: ' + path)
+
+    for name in sorted(totals):
+        print('{0}: {1:.3f}s ({2:.1f} MB/s)'.format(name, totals[name], n_bytes / 1e6 / max(totals[name], 1e-9)))
+
+    return totals
+
+
+def benchmark_us_pages(meta_paths, text_paths=()):
+    """
+    Compare the restricted congress.gov page parsers (UnitedStates.parse_meta_page and parse_text_page) against the
+    original full-tree parsing (parse_meta_page_legacy and parse_text_page_legacy) on saved pages, checking that both
+    extract the same fields. Each implementation runs in a forked child process, so that its CPU time and peak memory
+    are measured separately.
+
+    :param meta_paths: paths to saved /all-info pages (e.g. tests/fixtures/congress_gov/all-info-*.html).
+    :param text_paths: paths to saved /text pages (e.g. tests/fixtures/congress_gov/text-*.html).
+    :return: dictionary of implementation -> {'cpu': seconds per bill, 'max_rss': peak memory growth in MB}.
+    """
+
+    n_bills = max(len(meta_paths), len(text_paths), 1)
+
+    out = {}
+    digests = {}
+
+    for name, suffix in [('restricted', ''), ('legacy', '_legacy')]:
+        usage = _run_forked(_parse_us_pages, meta_paths, text_paths, suffix)
+
+        out[name] = {'cpu': usage['cpu'] / n_bills, 'max_rss': usage['max_rss']}
+        digests[name] = usage['result']
+
+        print('{0}: {1:.1f} ms CPU per bill, {2:.1f} MB peak memory'.format(name, 1000 * out[name]['cpu'],
+                                                                           out[name]['max_rss']))
+
+    for path, restricted, legacy in zip(list(meta_paths) + list(text_paths), digests['restricted'], digests['legacy']):
+        if restricted != legacy:
+            print('Output mismatch: ' + path)
+
+    return out
+
+
+def _parse_us_pages(meta_paths, text_paths, suffix):
+    """ Parse saved US pages with one set of parsers, returning a digest of each page's output. """
+    from _country_scrapers_annual import UnitedStates
+
+    digests = []
+
+    for paths, parser in [(meta_paths, 'parse_meta_page'), (text_paths, 'parse_text_page')]:
+        function = getattr(UnitedStates, parser + suffix)
+
+        for path in paths:
+            with open(path, 'rb') as f:
+                html = f.read()
+
+            # pages the scraper cannot handle should fail the same way with either parser
+            try:
+                output = function(html)
+            except Exception as e:
+                output = 'error: ' + type(e).__name__
+
+            digests.append(_hashlib.sha1(_json.dumps(output, sort_keys=True)).hexdigest())
+
+    return digests
+
+
+def _run_forked(function, *args):
+    """
+    Run function(*args) in a forked child, returning its result with the child's CPU time (user + system) and the
+    growth of its peak resident memory (in MB) over what it inherited at fork.
+    """
+    import resource
+
+    read_end, write_end = _os.pipe()
+
+    pid = _os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            _os.close(read_end)
+
+            start = resource.getrusage(resource.RUSAGE_SELF)
+            result = function(*args)
+            end = resource.getrusage(resource.RUSAGE_SELF)
+
+            # ru_maxrss is in kB on Linux
+            usage = {'cpu': end.ru_utime + end.ru_stime - start.ru_utime - start.ru_stime,
+                     'max_rss': (end.ru_maxrss - start.ru_maxrss) / 1024.,
+                     'result': result}
+
+            with _os.fdopen(write_end, 'wb') as f:
+                f.write(_json.dumps(usage))
+
+            status = 0
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            _os._exit(status)
+
+    _os.close(write_end)
+    with _os.fdopen(read_end, 'rb') as f:
+        usage = f.read()
+
+    _, status = _os.waitpid(pid, 0)
+    if status != 0:
+        raise RuntimeError('benchmark child process failed')
+
+    return _json.loads(usage)
+
+
+def _time_call(function, *args):
+    start = _time.time()
+    function(*args)
+
+    return _time.time() - start
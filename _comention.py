@@ -0,0 +1,137 @@
+from collections import Counter as _Counter
+
+
+def count_entities(entity_chunks):
+    """ Count every entity mention across a document's chunks. """
+
+    counts = _Counter()
+    for chunk in entity_chunks:
+        counts.update(chunk)
+
+    return counts
+
+
+def edge_weights(entity_chunks):
+    """
+    Co-mention edge weights for a single document. Two entities are linked within a chunk with weight equal to the
+    smaller of their two mention counts there, and weights are summed across chunks.
+
+    :param entity_chunks: list of chunks, each a list of the entity strings mentioned in it.
+    :return: dictionary mapping (entity, entity) tuples to weights. Each pair appears once, oriented as first seen.
+    """
+
+    edges = {}
+
+    for chunk in entity_chunks:
+        counts = _Counter(chunk)
+
+        if len(counts) > 1:
+            entities = list(set(chunk))
+
+            for i in range(len(entities)):
+                e1 = entities[i]
+                c1 = counts[e1]
+
+                for j in range(i + 1, len(entities)):
+                    e2 = entities[j]
+                    weight = min(c1, counts[e2])
+
+                    if (e1, e2) in edges:
+                        edges[(e1, e2)] += weight
+                    elif (e2, e1) in edges:
+                        edges[(e2, e1)] += weight
+                    else:
+                        edges[(e1, e2)] = weight
+
+    return edges
+
+
+def batch_edge_weights(documents):
+    """
+    Vectorized co-mention edge weights for a batch of documents, with the same definition and orientation as
+    edge_weights. Each (document, entity) pair gets an integer ID, and every chunk contributes the ID pairs of its
+    distinct entities (in the same order as edge_weights visits them), weighted by the smaller of their mention counts.
+    The weights of all chunks are then summed per pair in a single sort, and each pair keeps the orientation of the
+    first chunk it appears in.
+
+    :param documents: list of documents, each a list of chunks (lists of entity strings).
+    :return: list of edge weight dictionaries, one per document.
+    """
+
+    import numpy as np
+
+    column_ids = {}
+    column_names = []
+    column_docs = []
+
+    # distinct entities of each chunk with more than one, flattened, along with their mention counts and the size
+    # and position of their chunk
+    columns = []
+    counts = []
+    sizes = []
+    n_chunks = 0
+
+    for doc_id, entity_chunks in enumerate(documents):
+        for chunk in entity_chunks:
+            chunk_counts = _Counter(chunk)
+            if len(chunk_counts) < 2:
+                continue
+
+            for entity in list(set(chunk)):
+                column = column_ids.get((doc_id, entity))
+                if column is None:
+                    column = column_ids[(doc_id, entity)] = len(column_names)
+                    column_names.append(entity)
+                    column_docs.append(doc_id)
+
+                columns.append(column)
+                counts.append(chunk_counts[entity])
+
+            sizes.append(len(chunk_counts))
+            n_chunks += 1
+
+    out = [{} for _ in documents]
+    if not n_chunks:
+        return out
+
+    columns = np.array(columns, dtype=np.int64)
+    counts = np.array(counts, dtype=np.int64)
+    sizes = np.array(sizes, dtype=np.int64)
+    starts = np.cumsum(sizes) - sizes
+
+    # index pairs (a, b), a before b within a chunk, expanded for all chunks of the same size at once
+    firsts = []
+    seconds = []
+    chunk_ids = []
+
+    for size in np.unique(sizes):
+        chunks = np.flatnonzero(sizes == size)
+        a, b = np.triu_indices(size, k=1)
+
+        firsts.append((starts[chunks][:, None] + a).ravel())
+        seconds.append((starts[chunks][:, None] + b).ravel())
+        chunk_ids.append(np.repeat(chunks, len(a)))
+
+    firsts = np.concatenate(firsts)
+    seconds = np.concatenate(seconds)
+    chunk_ids = np.concatenate(chunk_ids)
+
+    weights = np.minimum(counts[firsts], counts[seconds])
+    firsts = columns[firsts]
+    seconds = columns[seconds]
+
+    # unordered pair key; sorting by key, then chunk, puts each pair's first chunk at the start of its run
+    n_columns = len(column_names)
+    keys = np.minimum(firsts, seconds) * n_columns + np.maximum(firsts, seconds)
+
+    order = np.lexsort((chunk_ids, keys))
+    keys = keys[order]
+
+    run_starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    totals = np.add.reduceat(weights[order], run_starts)
+    run_firsts = order[run_starts]
+
+    for i, j, weight in zip(firsts[run_firsts], seconds[run_firsts], totals):
+        out[column_docs[i]][(column_names[i], column_names[j])] = int(weight)
+
+    return out
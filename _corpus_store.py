@@ -0,0 +1,269 @@
+import json as _json
+import os as _os
+import shutil as _shutil
+import zlib as _zlib
+
+
+class CorpusStore:
+    def __init__(self, store_dir, segment_bytes=256 * 1024 ** 2):
+        """
+        Compressed, append-only storage for a country's documents. Each record is a zlib-compressed JSON document
+        appended to the current segment file (segment-00000.dat, segment-00001.dat, ...); a new segment is started
+        once the current one passes segment_bytes. An append-only index file maps each document ID to the segment,
+        offset and length of its latest version, so single documents can be read without touching the rest of the
+        corpus. Overwriting a document appends a new version; compact() reclaims the space held by old versions. A
+        compaction interrupted by a crash is finished or rolled back when the store is next opened.
+
+        :param store_dir: directory holding the segments and index; created if necessary.
+        :param segment_bytes: size at which to start a new segment.
+        :return:
+        """
+
+        self.store_dir = store_dir
+        self.segment_bytes = segment_bytes
+        self.index_path = _os.path.join(store_dir, 'index.log')
+
+        _recover_compaction(store_dir)
+
+        if not _os.path.isdir(store_dir):
+            _os.makedirs(store_dir)
+
+        # id -> (segment number, offset, length)
+        self.index = {}
+
+        if _os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    fields = line.rstrip('\n').split('\t')
+
+                    # a crash mid-append can leave a partial last line, which is simply dropped
+                    if len(fields) == 4 and fields[3].isdigit():
+                        self.index[fields[0].decode('utf8')] = (int(fields[1]), int(fields[2]), int(fields[3]))
+
+        segment_files = [f for f in _os.listdir(store_dir) if f.startswith('segment-') and f.endswith('.dat')]
+        segments = [int(f[len('segment-'):-len('.dat')]) for f in segment_files]
+        self.segment = max(segments) if segments else 0
+
+        # bytes held by the latest version of each document, and by everything else in the segments (superseded
+        # versions, and records a crash left out of the index)
+        self.live_bytes = sum(length for _, _, length in self.index.values())
+        self.dead_bytes = sum(_os.path.getsize(_os.path.join(store_dir, f)) for f in segment_files) - self.live_bytes
+
+        self._writer = None
+        self._index_writer = None
+        self._readers = {}
+
+    def __contains__(self, id_val):
+        return id_val in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return list(self.index)
+
+    def get(self, id_val):
+        """ Read a single document by ID. """
+
+        segment, offset, length = self.index[id_val]
+
+        reader = self._reader(segment)
+        reader.seek(offset)
+
+        return _json.loads(_zlib.decompress(reader.read(length)))
+
+    def put(self, id_val, content):
+        """ Append a document (or a new version of it) to the store. """
+
+        data = _zlib.compress(_json.dumps(content))
+
+        if self._writer is None or self._writer.tell() >= self.segment_bytes:
+            self._open_segment()
+
+        offset = self._writer.tell()
+        self._writer.write(data)
+        self._writer.flush()
+
+        # the index entry is only written once the record itself is on disk
+        if self._index_writer is None:
+            self._index_writer = open(self.index_path, 'ab')
+
+        self._index_writer.write('\t'.join([id_val.encode('utf8'), str(self.segment), str(offset),
+                                            str(len(data))]) + '\n')
+        self._index_writer.flush()
+
+        if id_val in self.index:
+            superseded = self.index[id_val][2]
+
+            self.live_bytes -= superseded
+            self.dead_bytes += superseded
+
+        self.live_bytes += len(data)
+        self.index[id_val] = (self.segment, offset, len(data))
+
+    def dead_fraction(self):
+        """ Share of the segment bytes that compact() would reclaim. """
+
+        total = self.live_bytes + self.dead_bytes
+
+        return float(self.dead_bytes) / total if total else 0.
+
+    def iter_records(self, ids=None):
+        """
+        Stream (id, document) pairs over the whole store, or over the given IDs, in on-disk order so that segments
+        are read sequentially.
+        """
+
+        if ids is None:
+            ids = self.index
+
+        locations = sorted((self.index[id_val], id_val) for id_val in ids)
+
+        for (segment, offset, length), id_val in locations:
+            reader = self._reader(segment)
+            if reader.tell() != offset:
+                reader.seek(offset)
+
+            yield id_val, _json.loads(_zlib.decompress(reader.read(length)))
+
+    def compact(self):
+        """
+        Rewrite the live version of every document into fresh segments, dropping superseded versions. The new store is
+        built beside the old one (<store>.compact) and swapped in with two directory renames - the old store to
+        <store>.old, then the new one into its place - so the live store is complete at every point, and the old one
+        is only deleted once the new one is in place.
+        """
+
+        compact_dir, old_dir = _compaction_dirs(self.store_dir)
+
+        # left over from a compaction that crashed before it finished writing
+        if _os.path.isdir(compact_dir):
+            _shutil.rmtree(compact_dir)
+
+        compacted = CorpusStore(compact_dir, self.segment_bytes)
+
+        for id_val, content in self.iter_records():
+            compacted.put(id_val, content)
+
+        compacted.close()
+        self.close()
+
+        for file_name in _os.listdir(compact_dir):
+            _fsync_file(_os.path.join(compact_dir, file_name))
+
+        _os.rename(self.store_dir, old_dir)
+        _os.rename(compact_dir, self.store_dir)
+        _shutil.rmtree(old_dir)
+
+        self.index = compacted.index
+        self.segment = compacted.segment
+        self.live_bytes = compacted.live_bytes
+        self.dead_bytes = 0
+
+    def close(self):
+        for handle in [self._writer, self._index_writer] + self._readers.values():
+            if handle is not None:
+                handle.close()
+
+        self._writer = None
+        self._index_writer = None
+        self._readers = {}
+
+    def _open_segment(self):
+        if self._writer is not None:
+            self._writer.close()
+
+            self.segment += 1
+
+        self._writer = open(self._segment_path(self.segment), 'ab')
+
+        # start a new segment straight away if the existing one is already full
+        if self._writer.tell() >= self.segment_bytes:
+            self._writer.close()
+
+            self.segment += 1
+            self._writer = open(self._segment_path(self.segment), 'ab')
+
+        # readers may hold a stale view of the segment being appended to
+        if self.segment in self._readers:
+            self._readers.pop(self.segment).close()
+
+    def _reader(self, segment):
+        if self._writer is not None and segment == self.segment:
+            self._writer.flush()
+
+        if segment not in self._readers:
+            self._readers[segment] = open(self._segment_path(segment), 'rb')
+
+        return self._readers[segment]
+
+    def _segment_path(self, segment):
+        return _os.path.join(self.store_dir, 'segment-{0:05d}.dat'.format(segment))
+
+
+def _compaction_dirs(store_dir):
+    base = store_dir.rstrip(_os.sep)
+
+    return base + '.compact', base + '.old'
+
+
+def _recover_compaction(store_dir):
+    """
+    Finish or roll back a compaction that was interrupted (see CorpusStore.compact). The new store is only moved into
+    place once it is complete, so a leftover <store>.compact beside a missing store is swapped in, while one beside
+    the store is an unfinished copy and is dropped. A leftover <store>.old is deleted once the store is in place, and
+    put back otherwise.
+    """
+
+    compact_dir, old_dir = _compaction_dirs(store_dir)
+
+    if _os.path.isdir(old_dir) and not _os.path.isdir(store_dir):
+        if _os.path.isdir(compact_dir):
+            _os.rename(compact_dir, store_dir)
+        else:
+            _os.rename(old_dir, store_dir)
+
+    if _os.path.isdir(old_dir):
+        _shutil.rmtree(old_dir)
+
+    if _os.path.isdir(compact_dir):
+        _shutil.rmtree(compact_dir)
+
+
+def _fsync_file(path):
+    with open(path, 'ab') as f:
+        _os.fsync(f.fileno())
+
+
+def migrate_directory(source_dir, store, remove=False):
+    """
+    Copy a directory of one-JSON-file-per-document (the original Legislation/<Country>/Annual layout) into a store,
+    keyed by file name without the .json extension. Documents already in the store (from an earlier, possibly
+    interrupted, migration) are skipped, so running it again does not add duplicate records.
+
+    :param source_dir: directory to migrate.
+    :param store: CorpusStore to write to.
+    :param remove: delete each source file once it is in the store.
+    :return: number of documents migrated.
+    """
+
+    n_migrated = 0
+
+    for file_name in sorted(_os.listdir(source_dir)):
+        if not file_name.endswith('.json'):
+            continue
+
+        full_path = _os.path.join(source_dir, file_name)
+        id_val = file_name[:-len('.json')].decode('utf8')
+
+        if id_val not in store:
+            with open(full_path, 'rb') as f:
+                content = _json.loads(f.read())
+
+            store.put(id_val, content)
+            n_migrated += 1
+
+        if remove:
+            _os.remove(full_path)
+
+    return n_migrated
@@ -9,7 +9,6 @@ class _AuxiliaryBase:
         self.aux_files = [os.path.join(aux_path, f) for f in os.listdir(aux_path) if self.country in f]
 
     def add_auxiliary(self):
-        import re
         import json
 
         auxiliary = self._retrieve_auxiliary()
@@ -17,25 +16,32 @@ class _AuxiliaryBase:
             with open(file_name, 'rb') as f:
                 content = json.loads(f.read())
 
-            print content['id']
-            congress = re.search('^[0-9]+', content['id']).group(0)
-            chamber = re.search('house|senate', content['id']).group(0)
-            id_val = re.search('[0-9]+$', content['id']).group(0)
-
-            if content['id'] in auxiliary:
-                content.update(auxiliary[content['id']])
-            else:
-                matches = [k for k in auxiliary if congress == re.search('^[0-9]+', k).group(0) and
-                           chamber in k and id_val == re.search('[0-9]+$', k).group(0)]
-                if len(matches) == 1:
-                    content.update(auxiliary[matches[0]])
-
-                else:
-                    content.update({k: None for k in auxiliary[auxiliary.keys()[0]]})
+            self.augment(content, auxiliary)
 
             with open(file_name, 'wb') as f:
                 f.write(json.dumps(content))
 
+    @staticmethod
+    def augment(content, auxiliary):
+        """ Add the auxiliary fields matching a single document's ID to its content, in place. """
+        import re
+
+        print content['id']
+        congress = re.search('^[0-9]+', content['id']).group(0)
+        chamber = re.search('house|senate', content['id']).group(0)
+        id_val = re.search('[0-9]+$', content['id']).group(0)
+
+        if content['id'] in auxiliary:
+            content.update(auxiliary[content['id']])
+        else:
+            matches = [k for k in auxiliary if congress == re.search('^[0-9]+', k).group(0) and
+                       chamber in k and id_val == re.search('[0-9]+$', k).group(0)]
+            if len(matches) == 1:
+                content.update(auxiliary[matches[0]])
+
+            else:
+                content.update({k: None for k in auxiliary[auxiliary.keys()[0]]})
+
     def _retrieve_auxiliary(self):
         return {}
 
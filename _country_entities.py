@@ -1,22 +1,60 @@
 import nltk as _nltk
+from collections import Counter as _Counter
 
+import _comention
+import _graph_metrics
 
-class _EntityBase:
-    def __init__(self, load_lstm):
-
-        import sys
 
-        if load_lstm:
-            sys.path.append('/home/rbshaffer/sequence_tagging')
-
-            from model.ner_model import NERModel
-            from model.config import Config
-            config = Config()
+class _EntityBase:
+    def __init__(self, load_lstm, edge_backend='python', tag_batch_size=64, ner_service=None, tagger='lstm',
+                 token_cache=None):
+        """
+        :param load_lstm: load the LSTM entity tagger.
+        :param edge_backend: 'python' to count co-mention edges one document at a time, or 'numpy' to compute them
+                             with numpy array operations, batched across documents ('sparse' is accepted as its old
+                             name).
+        :param tag_batch_size: number of sentences passed to the tagger per call.
+        :param ner_service: address of a running _ner_service.NERServer (or True for the default address). If given,
+                            sentences are tagged by that shared service instead of a model loaded here.
+        :param tagger: 'lstm' for the LSTM entity tagger, or 'gazetteer' to match the names in agency_list.txt (fast
+                       and without TensorFlow, but limited to listed names).
+        :param token_cache: _token_cache.TokenCache (or a directory for one) used to memoize sentence and word
+                            tokenization of chunks.
+        """
+
+        if tagger not in ('lstm', 'gazetteer'):
+            raise ValueError('Unknown tagger: ' + tagger)
+
+        if edge_backend == 'sparse':
+            edge_backend = 'numpy'
+
+        if edge_backend not in ('python', 'numpy'):
+            raise ValueError('Unknown edge backend: ' + edge_backend)
+
+        self.edge_backend = edge_backend
+        self.tag_batch_size = tag_batch_size
+
+        if isinstance(token_cache, basestring):
+            import _token_cache
+            token_cache = _token_cache.TokenCache(token_cache)
+
+        self.token_cache = token_cache
+
+        if tagger == 'gazetteer':
+            import _gazetteer
+
+            self.model = _gazetteer.GazetteerTagger.from_file(tokenize=_nltk.word_tokenize)
+
+        elif ner_service:
+            import _ner_service
+
+            if ner_service is True:
+                self.model = _ner_service.NERClient()
+            else:
+                self.model = _ner_service.NERClient(ner_service)
 
-            # build model
-            self.model = NERModel(config)
-            self.model.build()
-            self.model.restore_session(config.dir_model)
+        elif load_lstm:
+            self.model = load_lstm_model()
 
     def get_chunks(self, parsed):
         return []
@@ -24,117 +62,178 @@ class _EntityBase:
     def do_entity_extraction(self, parsed):
         """ Somewhat complex function to actually do the entity extraction. """
 
-        import networkx as nx
-        import textwrap
-        from numpy import mean
+        return self.do_entity_extraction_batch([parsed])[0]
+
+    def do_entity_extraction_batch(self, parsed_docs):
+        """
+        Entity extraction for several documents at once (e.g. a whole title or congress). With the numpy edge
+        backend, co-mention edges for the whole batch are computed in a single call. Returns one result per document,
+        as for do_entity_extraction.
+        """
 
-        chunks = self.get_chunks(parsed)
+        entity_docs = self.tag_documents([self.get_chunks(parsed) for parsed in parsed_docs])
+        edge_docs = self.edge_weights(entity_docs)
 
-        def total_edge_count(count_obj, total_counter=0):
-            """ Sub-function to calculate total number of edges in a container. """
+        return [self._summarize(entity_chunks, edges) for entity_chunks, edges in zip(entity_docs, edge_docs)]
 
-            if count_obj:
-                ceiling = count_obj.pop(count_obj.keys()[0])
-                total_counter += sum([min(ceiling, count_obj[c]) for c in count_obj])
-                total_counter = total_edge_count(count_obj, total_counter)
+    def edge_weights(self, entity_docs):
+        """ Co-mention edge weights for each of a list of documents (lists of entity chunks), with the edge backend. """
 
-            return total_counter
+        if self.edge_backend == 'numpy':
+            return _comention.batch_edge_weights(entity_docs)
+        else:
+            return [_comention.edge_weights(entity_chunks) for entity_chunks in entity_docs]
 
-        def observed_edge_count(raw_obj):
-            """ Sub-function to calculate the observed number of edges in a container. """
+    def do_entity_extraction_incremental(self, docs, sections, states):
+        """
+        Entity extraction for successive editions of the same documents (e.g. a U.S. Code chapter across years). Each
+        chunk is looked up in the section store by a hash of its text, and only chunks not seen before are tagged (in
+        one batch across all docs). Each document's co-mention counts are then updated from its previous edition by
+        adding the contributions of new chunks and subtracting those of removed ones, rather than rebuilt. The edges of
+        every added or removed chunk are computed together, in one call to the edge backend.
 
-            observed_counter = 0
+        :param docs: list of (document ID, parsed) pairs, with editions of a document in order.
+        :param sections: _entity_store.SectionStore holding the entities tagged in each chunk.
+        :param states: dictionary of document ID -> co-mention counts of its latest edition; updated in place.
+        :return: list of results, one per document, as for do_entity_extraction.
+        """
 
-            for chunk_obj in raw_obj:
-                chunk_entities = {e: chunk_obj.count(e) for e in set(chunk_obj)}
-                observed_counter += total_edge_count(chunk_entities)
+        key_docs = []
+        new_chunks = {}
 
-            return observed_counter
+        for _, parsed in docs:
+            keys = []
+            for chunk in self.get_chunks(parsed):
+                key = sections.content_key(chunk)
+                if key not in sections:
+                    new_chunks[key] = chunk
 
-        # container to store all entities extracted, for matching use in-string
-        # maybe consider shifting this inside the loop to only match in-chunk?
-        # though note that the output generator currently depends on this
-        all_entities = []
+                keys.append(key)
+
+            key_docs.append(keys)
+
+        new_keys = list(new_chunks)
+        if new_keys:
+            tagged = self.tag_documents([[new_chunks[key] for key in new_keys]])[0]
+            for key, entities in zip(new_keys, tagged):
+                sections.put(key, entities)
+
+        # sections added (positive) and removed (negative) since each document's previous edition
+        changes = []
+        previous = {}
+
+        for (doc_id, _), keys in zip(docs, key_docs):
+            last = previous.get(doc_id)
+            if last is None:
+                last = states[doc_id]['sections'] if doc_id in states else _Counter()
+
+            current = _Counter(keys)
+
+            changes.append([(key, n) for key, n in (current - last).items()] +
+                           [(key, -n) for key, n in (last - current).items()])
+            previous[doc_id] = current
+
+        changed_keys = list(set(key for change in changes for key, _ in change))
+        chunk_edges = dict(zip(changed_keys, self.edge_weights([[sections.get(key)] for key in changed_keys])))
 
-        # output container
         out = []
 
-        # iterate over units of analysis, as defined in country-specific functions
-        for chunk in chunks:
-            entity_strings = []
+        for (doc_id, _), keys, change in zip(docs, key_docs, changes):
+            state = states.get(doc_id) or {'sections': _Counter(), 'entities': _Counter(), 'edges': _Counter()}
+
+            for key, n in change:
+                _update_counts(state, sections.get(key), chunk_edges[key], n)
 
-            sentences = self.process_doc(chunk)
+            state['sections'] = _Counter(keys)
+            states[doc_id] = state
 
-            for sent in sentences:
-                entities = []
-                tags = self.model.predict(sent)
+            entities = [e for e, n in state['entities'].items() for _ in range(n)]
+            edges = dict(state['edges'])
 
-                for i, t in enumerate(tags):
-                    if t == 'B-MISC':
-                        entities.append([sent[i]])
-                    elif t == 'I-MISC' and len(entities) > 0:
-                        # this condition shouldn't be necessary - need to figure out why this is happening
-                        entities[-1].append(sent[i])
+            out.append(self._summarize([entities], edges))
 
-                new_entities = [' '.join(e) for e in entities]
-                new_entities = ['\n'.join(textwrap.wrap(e.strip(), 20)) for e in new_entities]
+        return out
 
-                entity_strings += new_entities
-                all_entities += new_entities
+    def tag_chunks(self, chunks):
+        """ Tag each unit of analysis, returning the list of entity strings mentioned in each. """
 
-            out.append(entity_strings)
+        return self.tag_documents([chunks])[0]
+
+    def tag_documents(self, chunk_docs):
+        """
+        Tag the units of analysis of several documents at once. Sentences from every chunk of every document are
+        tagged together, so the tagger works on full batches, and the entities found are mapped back to their chunk.
+
+        :param chunk_docs: list of documents, each a list of chunks (as returned by get_chunks).
+        :return: list of documents, each a list of the entity strings mentioned in each chunk.
+        """
+
+        sentences = []
+        owners = []
+
+        for doc_id, chunks in enumerate(chunk_docs):
+            for chunk_id, chunk in enumerate(chunks):
+                for sent in self.tokenize(chunk):
+                    sentences.append(sent)
+                    owners.append((doc_id, chunk_id))
+
+        # output container
+        out = [[[] for _ in chunks] for chunks in chunk_docs]
+
+        for sent, tags, (doc_id, chunk_id) in zip(sentences, self.tag_sentences(sentences), owners):
+            out[doc_id][chunk_id] += _entity_strings(sent, tags)
+
+        return out
+
+    def tag_sentences(self, sentences):
+        """ Tag a list of tokenized sentences, returning one list of tags per sentence, in the original order. """
+
+        # taggers that handle whole lists themselves (e.g. the shared NER service)
+        if hasattr(self.model, 'tag_sentences'):
+            return self.model.tag_sentences(sentences)
+
+        return tag_with_model(self.model, sentences, self.tag_batch_size)
+
+    @staticmethod
+    def _summarize(entity_chunks, edges):
+        """
+        Network statistics for one document, computed on edge arrays (see _graph_metrics). Callers that need the
+        networkx graph build it with _graph_metrics.result_graph.
+        """
 
         # get the actual output
-        entities_count = {e: all_entities.count(e) for e in set(all_entities)}
-
-        out = [[e for e in row if e in entities_count] for row in out]
-
-        edges = {}
-        for chunk in out:
-            if len(set(chunk)) > 1:
-                entities = list(set(chunk))
-                for i in range(len(entities)):
-                    for j in range(i+1, len(entities)):
-                        e1 = entities[i]
-                        e2 = entities[j]
-
-                        if (e1, e2) in edges:
-                            edges[(e1, e2)] += min(chunk.count(e1), chunk.count(e2))
-                        elif (e2, e1) in edges:
-                            edges[(e2, e1)] += min(chunk.count(e1), chunk.count(e2))
-                        else:
-                            edges[(e1, e2)] = min(chunk.count(e1), chunk.count(e2))
+        entities_count = _comention.count_entities(entity_chunks)
 
         edges = [k + (w,) for k, w in edges.iteritems()]
 
         if entities_count:
-            graph = nx.Graph()
-            for u, v, w in edges:
-                graph.add_edge(u, v, weight=w)
+            nodes, sources, targets, weights = _graph_metrics.edge_arrays(edges)
 
-            degree = list(graph.degree(weight='weight').values())
-            if degree:
-                average_degree = mean(list(graph.degree(weight='weight').values()))
+            if nodes:
+                average_degree = _graph_metrics.weighted_degree(len(nodes), sources, targets, weights).mean()
             else:
                 average_degree = 0
 
-            # count_zeroes?
-            try:
-                clustering_coeff = nx.average_clustering(graph, weight='weight', count_zeros=True)
-            except ZeroDivisionError:
-                clustering_coeff = 0
+            clustering_coeff = _graph_metrics.average_clustering(len(nodes), sources, targets, weights)
 
         else:
-            graph = None
             clustering_coeff = None
             average_degree = None
 
-        total_nodes = len(set(all_entities))
+        total_nodes = len(entities_count)
         total_edges = sum([e[2] for e in edges])
 
-        return {'graph': graph, 'edges': edges, 'total_nodes': total_nodes, 'clustering': clustering_coeff,
+        return {'edges': edges, 'total_nodes': total_nodes, 'clustering': clustering_coeff,
                 'total_edges': total_edges, 'average_degree': average_degree}
 
+    def tokenize(self, chunk):
+        """ Sentence and word tokenization of a chunk, through the token cache if there is one. """
+
+        if self.token_cache is None:
+            return self.process_doc(chunk)
+
+        return self.token_cache.tokenize(chunk, self.process_doc)
+
     @staticmethod
     def process_doc(document):
 
@@ -144,9 +243,98 @@ class _EntityBase:
         return sentences
 
 
+def load_lstm_model():
+    """ Build the LSTM entity tagger and restore its trained weights. """
+    import sys
+
+    sys.path.append('/home/rbshaffer/sequence_tagging')
+
+    from model.ner_model import NERModel
+    from model.config import Config
+    config = Config()
+
+    # build model
+    model = NERModel(config)
+    model.build()
+    model.restore_session(config.dir_model)
+
+    return model
+
+
+def tag_with_model(model, sentences, batch_size):
+    """
+    Tag a list of tokenized sentences with a loaded model, returning one list of tags per sentence, in the original
+    order. If the model supports batch prediction, sentences are sorted into buckets of similar length (to limit
+    padding) and tagged batch_size at a time; otherwise they are tagged one by one.
+    """
+
+    if not hasattr(model, 'predict_batch'):
+        return [model.predict(sent) if sent else [] for sent in sentences]
+
+    tags = [[] for _ in sentences]
+
+    order = sorted([i for i, sent in enumerate(sentences) if sent], key=lambda i: len(sentences[i]))
+
+    for batch_start in range(0, len(order), batch_size):
+        batch = order[batch_start:batch_start + batch_size]
+
+        pred_ids, _ = model.predict_batch([_model_words(model, sentences[i]) for i in batch])
+
+        for i, sent_ids in zip(batch, pred_ids):
+            # padded predictions are trimmed back to the sentence length
+            tags[i] = [model.idx_to_tag[idx] for idx in list(sent_ids)[:len(sentences[i])]]
+
+    return tags
+
+
+def _model_words(model, sent):
+    """ Word preprocessing applied by NERModel.predict, for use with predict_batch. """
+
+    words = [model.config.processing_word(w) for w in sent]
+    if type(words[0]) == tuple:
+        words = zip(*words)
+
+    return words
+
+
+def _update_counts(state, entities, edges, n):
+    """ Add (or, for negative n, remove) n copies of a chunk's entity mentions and co-mention edges. """
+
+    for entity in entities:
+        state['entities'][entity] += n
+
+    # edges are kept in a fixed orientation, since the same pair may be first seen either way round in different chunks
+    for pair, weight in edges.items():
+        state['edges'][tuple(sorted(pair))] += n * weight
+
+    for counts in [state['entities'], state['edges']]:
+        for k in [k for k, v in counts.items() if v <= 0]:
+            del counts[k]
+
+
+def _entity_strings(sent, tags):
+    """ Collect the entity strings marked in a tagged sentence. """
+    import textwrap
+
+    entities = []
+
+    for i, t in enumerate(tags):
+        if t == 'B-MISC':
+            entities.append([sent[i]])
+        elif t == 'I-MISC' and len(entities) > 0:
+            # this condition shouldn't be necessary - need to figure out why this is happening
+            entities[-1].append(sent[i])
+
+    new_entities = [' '.join(e) for e in entities]
+    new_entities = ['\n'.join(textwrap.wrap(e.strip(), 20)) for e in new_entities]
+
+    return new_entities
+
+
 class UnitedStatesAnnual(_EntityBase):
-    def __init__(self, load_lstm=True):
-        _EntityBase.__init__(self, load_lstm)
+    def __init__(self, load_lstm=True, edge_backend='python', tag_batch_size=64, ner_service=None, tagger='lstm',
+                 token_cache=None):
+        _EntityBase.__init__(self, load_lstm, edge_backend, tag_batch_size, ner_service, tagger, token_cache)
 
     def get_chunks(self, parsed):
         i = 0
@@ -166,8 +354,9 @@ class UnitedStatesAnnual(_EntityBase):
 
 
 class UnitedStatesConsolidated(_EntityBase):
-    def __init__(self, load_lstm=True):
-        _EntityBase.__init__(self, load_lstm)
+    def __init__(self, load_lstm=True, edge_backend='python', tag_batch_size=64, ner_service=None, tagger='lstm',
+                 token_cache=None):
+        _EntityBase.__init__(self, load_lstm, edge_backend, tag_batch_size, ner_service, tagger, token_cache)
 
     def get_chunks(self, parsed):
         chunks = ['']
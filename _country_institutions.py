@@ -2,15 +2,18 @@ import json as _json
 import string as _string
 import re as _re
 import wikipedia as _wikipedia
-from urllib2 import urlopen as _urlopen
 from bs4 import BeautifulSoup as _BeautifulSoup
 
+from _http import default_client as _default_client
+
 
 class _CountryBase:
-    def __init__(self):
+    def __init__(self, client=None):
         self.agency_dictionary = {}
         self.training_data = []
 
+        self.client = client if client is not None else _default_client()
+
     def update(self):
         return None
 
@@ -69,7 +72,7 @@ class UnitedStates(_CountryBase):
 
         for letter in letters:
             url = url_base + '/federal-agencies/' + letter
-            soup = _BeautifulSoup(_urlopen(url).read())
+            soup = _BeautifulSoup(self.client.urlopen(url).read())
 
             links_content = [l for l in soup.find_all('ul') if 'class' in l.attrs and 'one_column_bullet' in l['class']]
             if len(links_content) == 1:
@@ -95,7 +98,7 @@ class UnitedStates(_CountryBase):
         print 'Getting agencies from the federal register...'
 
         url_base = 'https://www.federalregister.gov/agencies'
-        soup = _BeautifulSoup(_urlopen(url_base))
+        soup = _BeautifulSoup(self.client.urlopen(url_base))
         links = soup.find_all(lambda x: x.name == 'li' and x.has_attr('data-filter-live') and not x.has_attr('class'))
 
         agency_dic = {}
@@ -146,7 +149,7 @@ class UnitedStates(_CountryBase):
                           ]
 
         for category_page in category_pages:
-            content_defunct = _json.loads(_urlopen(category_page).read())
+            content_defunct = _json.loads(self.client.urlopen(category_page).read())
 
             for result in content_defunct['query']['categorymembers']:
                 if result['ns'] == 0:
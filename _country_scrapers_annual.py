@@ -1,32 +1,74 @@
 import re as _re
-from time import sleep as _sleep
-from selenium import webdriver as _webdriver
-from selenium.webdriver.support.ui import Select as _Select
-from urllib2 import urlopen as _urlopen
+from HTMLParser import HTMLParser as _HTMLParser
+from urllib2 import HTTPError as _HTTPError
 from bs4 import BeautifulSoup as _BeautifulSoup
+from bs4 import UnicodeDammit as _UnicodeDammit
+
+from _download_log import DiscoveryLog as _DiscoveryLog
+from _download_log import IdRegistry as _IdRegistry
+from _http import default_client as _default_client
+from _http import host_limit as _host_limit
 
 
 class _CountryBase:
-    def __init__(self, log_data, country):
+    def __init__(self, log_data, country, workers=1, client=None):
         self.data = {}
         self.new_ids = []
 
         self.log_data = log_data
         self.country = country
 
-        if 'Annual' not in self.log_data:
-            self.log_data['Annual'] = {}
+        # number of requests to make concurrently, where a scraper can
+        self.workers = workers
+
+        # keep-alive HTTP client (_http.HttpClient), normally shared by every scraper in a run
+        self.client = client if client is not None else _default_client()
+
+        # indexed set of the IDs already downloaded, shared with (and persisted through) log_data
+        self.known_ids = _IdRegistry(self.log_data).namespace('Annual', self.country)
 
+        # sessions (congresses, years) already listed, so that closed ones are not searched again
+        self.discovery = _DiscoveryLog(self.log_data, self.country)
+
+        seen = set()
         for id_val in self._get_ids():
-            if id_val not in self.log_data['Annual'][self.country] and id_val is not None:
+            if id_val not in self.known_ids and id_val not in seen and id_val is not None:
+                seen.add(id_val)
                 self.new_ids.append(id_val)
 
-    def iter_data(self):
-        for id_val in self.new_ids:
-            print id_val
-            yield self._get_data(id_val)
+    def iter_data(self, workers=1):
+        """
+        Yield a metadata/text entry for each new ID. With more than one worker, entries are fetched concurrently on a
+        thread pool and yielded as they finish. In both cases, an ID is only marked complete in log_data once the
+        consumer has written its entry and asked for the next one, so an interrupted run resumes exactly where it
+        stopped. Discovery watermarks are only committed to log_data once every new ID has been yielded.
+
+        :param workers: number of IDs to fetch concurrently.
+        """
+
+        if workers <= 1:
+            for id_val in self.new_ids:
+                yield self._fetch(id_val)[1]
+
+                self.known_ids.append(id_val)
+
+        else:
+            from multiprocessing.pool import ThreadPool
+
+            pool = ThreadPool(workers)
+            try:
+                for id_val, entry in pool.imap_unordered(self._fetch, self.new_ids):
+                    yield entry
 
-            self.log_data['Annual'][self.country].append(id_val)
+                    self.known_ids.append(id_val)
+            finally:
+                pool.terminate()
+
+        self.discovery.commit()
+
+    def _fetch(self, id_val):
+        print id_val
+        return id_val, self._get_data(id_val)
 
     def _get_ids(self):
         return list()
@@ -95,7 +137,7 @@ class Canada(_CountryBase):
 
         searches = []
         for bill_type in bill_types:
-            search_content = _BeautifulSoup(_urlopen(base_url.format(bill_type)))
+            search_content = _BeautifulSoup(self.client.urlopen(base_url.format(bill_type)))
             sessions = [_re.sub('&Page=1', '&download=xml', tag['href']) for tag in search_content.find_all('a')
                         if _re.search('[0-9]{2}-[0-9]\s*\([0-9]+\)', tag.text) is not None]
             searches += sessions
@@ -103,24 +145,31 @@ class Canada(_CountryBase):
         id_vals = []
         for s in searches:
             url = base_url.format(s)
-            content = _BeautifulSoup(_urlopen(url).read(), features='xml')
+            content = _BeautifulSoup(self.client.urlopen(url).read(), features='xml')
 
             bills = content.find_all('Bill')
             for bill in bills:
                 meta = get_meta(bill)
 
-                if meta['id'] not in self.log_data['Annual']['Canada']:
+                if meta['id'] not in self.known_ids:
                     id_vals.append(meta['id'])
                     self.data[meta['id']] = meta
 
         return id_vals
 
     def _get_data(self, publication_id):
+        """
+        Fetch the HTML and XML versions of a publication, following its "Next Page" chain if it is split across pages.
+        Each page's XML is fetched in the background while the chain moves on to the next HTML page, and the entire-document
+        and next-page links are found by scanning the raw HTML rather than parsing it. Chains for different publications run concurrently
+        when iter_data is given several workers.
+        """
+        from multiprocessing.pool import ThreadPool
         from urllib2 import HTTPError
 
         def get_xml(xml_link):
             try:
-                xml_data = _urlopen(xml_link).read()
+                xml_data = self.client.urlopen(xml_link).read()
 
                 if 'xml' in xml_data[0:100]:
                     return xml_data
@@ -131,7 +180,7 @@ class Canada(_CountryBase):
                 return None
 
         def get_html(html_link):
-            html_response = _urlopen(html_link)
+            html_response = self.client.urlopen(html_link)
             html_data = html_response.read()
 
             return html_data
@@ -143,50 +192,65 @@ class Canada(_CountryBase):
         html_docs = []
         xml_docs = []
 
-        initial_html = _urlopen(html_base.format(publication_id)).read()
-        initial_soup = _BeautifulSoup(initial_html)
-        full_doc_links = [tag for tag in initial_soup.find_all('a')
-                          if 'Click here for the entire document' in tag.text]
-        next_links = [tag for tag in initial_soup.find_all('a') if 'Next Page' in repr(tag)]
+        initial_html = self.client.urlopen(html_base.format(publication_id)).read()
+        full_doc_links = _labelled_links(initial_html, 'Click here for the entire document')
+        next_links = _next_page_links(initial_html)
 
-        full_link_success = False
-        if len(full_doc_links) == 1:
-            url = parl_url + full_doc_links[0]['href']
-            try:
-                print 'full link...'
-                print publication_id, url
-                html_local = get_html(url)
-                xml_local = get_xml(url + '&xml=true')
+        pool = ThreadPool(2)
+        try:
+            full_link_success = False
+            if len(full_doc_links) == 1:
+                url = parl_url + full_doc_links[0]
+                try:
+                    print 'full link...'
+                    print publication_id, url
+                    xml_local = pool.apply_async(get_xml, [url + '&xml=true'])
+                    html_local = get_html(url)
+                    xml_local = xml_local.get()
 
-                html_docs.append(html_local)
-                xml_docs.append(xml_local)
+                    html_docs.append(html_local)
+                    xml_docs.append(xml_local)
 
-                full_link_success = True
-            except:
-                pass
+                    full_link_success = True
+                except:
+                    pass
 
-        next_link_success = False
-        if full_link_success is False and len(next_links) > 0:
-            try:
-                while len(next_links) > 0:
-                    file_regex = _re.search('File=[0-9]+', next_links[0]['href'])
+            next_link_success = False
+            if full_link_success is False and len(next_links) > 0:
+                # (html, pending xml) for each page of the chain
+                pages = []
+                try:
+                    while len(next_links) > 0:
+                        file_regex = _re.search('File=[0-9]+', next_links[0])
 
-                    # occasionally pages are malformed with "next" links that don't actually go anywhere
-                    if file_regex is not None:
-                        url = html_base.format(publication_id) + '&' + file_regex.group(0)
-                        print 'next links...'
-                        print publication_id, url
+                        # occasionally pages are malformed with "next" links that don't actually go anywhere
+                        if file_regex is not None:
+                            url = html_base.format(publication_id) + '&' + file_regex.group(0)
+                            print 'next links...'
+                            print publication_id, url
 
-                        html_docs.append(get_html(url))
-                        xml_docs.append(get_xml(url + '&xml=true'))
+                            html_page = get_html(url)
+                            pages.append((html_page, pool.apply_async(get_xml, [url + '&xml=true'])))
 
-                        next_links = [tag for tag in _BeautifulSoup(html_docs[-1]).find_all('a')
-                                      if 'Next Page' in repr(tag)]
-                    else:
-                        break
-                next_link_success = True
-            except:
-                pass
+                            next_links = _next_page_links(html_page)
+                        else:
+                            break
+
+                    next_link_success = True
+                except:
+                    pass
+
+                # pages fetched before a failure are kept, as when the chain was walked page by page; the chain only
+                # counts as complete if every page's XML request went through as well
+                for html_page, xml_page in pages:
+                    xml_page.wait()
+                    if not xml_page.successful():
+                        next_link_success = False
+
+                    html_docs.append(html_page)
+                    xml_docs.append(xml_page.get() if xml_page.successful() else None)
+        finally:
+            pool.terminate()
 
         if full_link_success is False and next_link_success is False:
             print 'failsafe'
@@ -481,33 +545,61 @@ class Canada(_CountryBase):
 
 class UnitedKingdom(_CountryBase):
 
+    first_year = 1988
+
+    # days after the end of a year before its list of acts is treated as final
+    closed_after_days = 90
+
     def _get_ids(self):
+        """
+        List the acts of each year since first_year. Years already listed after they closed are never requested
+        again; the remaining years are counted concurrently, one request each, on no more threads than the per-host
+        request limit allows in flight, and each count is recorded with the time it was taken. The host's rate limit
+        still paces the requests, so a first listing of every year takes about as long as the rate allows.
+        """
+        import datetime
+        from multiprocessing.pool import ThreadPool
+
+        today = datetime.date.today()
+
+        years = [year for year in range(self.first_year, today.year + 1) if not self.discovery.is_closed(year)]
+        if not years:
+            return []
+
+        pool = ThreadPool(min(len(years), _host_limit()))
+        try:
+            counts = pool.map(self._count_year, years)
+        finally:
+            pool.terminate()
+
         id_vals = []
-        years = range(1988, 2017)
 
-        for year in years:
-            soup = _BeautifulSoup(_urlopen('http://www.legislation.gov.uk/ukpga/{0}'.format(year)))
-            n_results = _re.search('has returned ([0-9]+) results', soup.text.lower()).group(1)
-            id_vals += [str(year) + '_' + str(i) for i in range(1, int(n_results) + 1)]
+        for year, n_results in zip(years, counts):
+            # an unexpected page is not recorded, so the year is listed again next run rather than closed as empty
+            if n_results is None:
+                print 'warning! No result count found for {0}.'.format(year)
+                continue
+
+            id_vals += [str(year) + '_' + str(i) for i in range(1, n_results + 1)]
+
+            closed = today > datetime.date(year, 12, 31) + datetime.timedelta(days=self.closed_after_days)
+            self.discovery.checked(year, closed, count=n_results)
 
         return id_vals
 
-    def _get_data(self, publication_id):
+    def _count_year(self, year):
+        """ Number of acts listed for a year, or None if the page does not give one. """
 
-        max_attempts = 10
-        attempts = 0
+        soup = _BeautifulSoup(self.client.urlopen('http://www.legislation.gov.uk/ukpga/{0}'.format(year)))
+        n_results = _re.search('has returned ([0-9]+) results', soup.text.lower())
 
-        xml_content = None
-        soup = None
+        return int(n_results.group(1)) if n_results is not None else None
 
-        while attempts < max_attempts:
-            search_id = _re.sub('_', '/', publication_id)
-            try:
-                xml_content = _urlopen('http://www.legislation.gov.uk/ukpga/{0}/data.xml'.format(search_id)).read()
-                soup = _BeautifulSoup(xml_content, 'xml')
-                break
-            except:
-                attempts += 1
+    def _get_data(self, publication_id):
+        # transient failures are retried by the request layer (_http)
+        search_id = _re.sub('_', '/', publication_id)
+        xml_content = self.client.urlopen('http://www.legislation.gov.uk/ukpga/{0}/data.xml'.format(search_id)).read()
+        soup = _BeautifulSoup(xml_content, 'xml')
 
         if 'amendment' in soup.title.text.lower():
             amend = True
@@ -541,97 +633,243 @@ class UnitedKingdom(_CountryBase):
 
 class UnitedStates(_CountryBase):
 
+    # advanced search for a single congress, corresponding to the following:
+    # - Only legislation that can become law
+    # - Only public bills/laws
+    # - Only actual laws
+    search_base = 'https://www.congress.gov/advanced-search/legislation?query='
+    search_query = {'congresses': [],
+                    'restrictionType': 'field',
+                    'restrictionFields': ['billSummary', 'allBillTitles'],
+                    'wordVariants': 'true',
+                    'legislationTypes': ['hr', 'hjres', 's', 'sjres'],
+                    'legislationScope': 'Public',
+                    'legislativeAction': '115',
+                    'legislativeActionWordVariants': 'true',
+                    'sponsorTypes': ['sponsor', 'sponsor'],
+                    'sponsorTypeBool': 'Or',
+                    'committeeBoolType': 'Or',
+                    'legislationCanBecomeLaw': 'true',
+                    'sponsorState': 'One',
+                    'sourceTab': 'legislation'}
+
+    # 101st congress (1989) is the first with full bill text and metadata
+    first_congress = 101
+
+    # days after the end of a congress before its list of laws is treated as final
+    closed_after_days = 180
+
+    page_size = 250
+
     def _get_ids(self):
-        # URL corresponding to the following search:
-        # - All congresses from 1989 forward (first date with full bill text and metadata)
-        # - Only legislation that can become law
-        # - Only public bills/laws
-        # - Only actual laws
+        """
+        List the laws of each congress since first_congress, skipping congresses already listed after they closed.
+        The current congress is worked out from the date, so new congresses are picked up without code changes.
+        """
+        import datetime
 
-        max_attempts = 10
+        today = datetime.date.today()
+
+        # the Nth congress runs from January 3rd, 1787 + 2N to January 3rd, 1789 + 2N
+        current_congress = (today.year - 1789) // 2 + 1
+        if today.year % 2 == 1 and today < datetime.date(today.year, 1, 3):
+            current_congress -= 1
 
         id_vals = []
 
-        search_url = 'https://www.congress.gov/advanced-search/legislation?query=%7B%22congresses%22%3A%5B%22114%22%2C'\
-                     '%22113%22%2C%22112%22%2C%22111%22%2C%22110%22%2C%22109%22%2C%22108%22%2C%22107%22%2C%22106%22%2C'\
-                     '%22105%22%2C%22104%22%2C%22103%22%2C%22102%22%2C%22101%22%5D%2C%22restrictionType%22%3A%22field%'\
-                     '22%2C%22restrictionFields%22%3A%5B%22billSummary%22%2C%22allBillTitles%22%5D%2C%22wordVariants%2'\
-                     '2%3A%22true%22%2C%22legislationTypes%22%3A%5B%22hr%22%2C%22hjres%22%2C%22s%22%2C%22sjres%22%5D%2'\
-                     'C%22legislationScope%22%3A%22Public%22%2C%22legislativeAction%22%3A%22115%22%2C%22legislativeAct'\
-                     'ionWordVariants%22%3A%22true%22%2C%22sponsorTypes%22%3A%5B%22sponsor%22%2C%22sponsor%22%5D%2C%22'\
-                     'sponsorTypeBool%22%3A%22Or%22%2C%22committeeBoolType%22%3A%22Or%22%2C%22legislationCanBecomeLaw%'\
-                     '22%3A%22true%22%2C%22sponsorState%22%3A%22One%22%2C%22sourceTab%22%3A%22legislation%22%7D'
-
-        driver = _webdriver.Firefox()
-        driver.get(search_url)
-
-        n_results = _Select(driver.find_element_by_name('pageSize'))
-        n_results.select_by_visible_text('250 per page')
-
-        while True:
-            soup = _BeautifulSoup(driver.page_source)
-            result_tags = [t for t in soup.find_all('span') if 'class' in t.attrs and 'result-heading' in t['class']]
-            result_urls = list(set([t.a['href'] for t in result_tags]))
-
-            new_ids = [_re.search('bill/(.*?)\?', url).group(1) for url in result_urls]
-            new_ids = [_re.sub('/', '_', e) for e in new_ids]
-            print new_ids
+        for congress in range(self.first_congress, current_congress + 1):
+            if self.discovery.is_closed(congress):
+                continue
+
+            new_ids = self._search_ids(self._search_url(congress))
             id_vals += new_ids
 
-            attempts = 0
-            while attempts < max_attempts:
-                try:
-                    next_button = driver.find_element_by_class_name('next')
-                    next_button.click()
-                    _sleep(5)
-                    break
-                except:
-                    print('reattempting pageforward...')
-                    _sleep(5)
-                    attempts += 1
-
-            attempts = 0
-            closed = False
-            while attempts < max_attempts:
-                print 'checking closure...'
-                try:
-                    closure_check = driver.find_element_by_class_name('next').get_attribute('outerHTML')
-                    if 'next off' in closure_check:
-                        closed = True
+            # every congress enacts laws, so an empty listing means an unexpected page; it is not recorded, so the
+            # congress is searched again next run rather than closed as empty
+            if not new_ids:
+                print 'warning! No search results found for congress {0}.'.format(congress)
+                continue
 
-                    break
-                except:
-                    attempts += 1
-                    print('reattempting closure check...')
-                    _sleep(5)
+            end = datetime.date(1789 + 2 * congress, 1, 3)
+            closed = today > end + datetime.timedelta(days=self.closed_after_days)
+            self.discovery.checked(congress, closed, count=len(new_ids))
+
+        return id_vals
+
+    def _search_url(self, congress):
+        import json
+        import urllib
+
+        query = dict(self.search_query, congresses=[str(congress)])
+        return self.search_base + urllib.quote(json.dumps(query, separators=(',', ':')), safe='')
+
+    def _search_ids(self, search_url):
+        """
+        Walk the paginated results of a search over plain HTTP. Result pages are requested directly by number, several
+        at a time, until a page comes back without results.
+        """
+        from multiprocessing.pool import ThreadPool
+
+        id_vals = []
+
+        pool = ThreadPool(max(self.workers, 1))
+        try:
+            page = 1
+            done = False
 
-            if closed:
-                break
+            while not done:
+                pages = range(page, page + max(self.workers, 1))
+                page += len(pages)
+
+                for new_ids in pool.map(lambda p: self._get_page_ids(search_url, p), pages):
+                    # anything after the first empty page is past the end of the results
+                    if not new_ids:
+                        done = True
+                        break
+
+                    print new_ids
+                    id_vals += new_ids
+        finally:
+            pool.terminate()
 
         return id_vals
 
-    def _get_data(self, publication_id):
-        import bs4
+    def _get_page_ids(self, search_url, page):
+        url = search_url + '&pageSize={0}&page={1}'.format(self.page_size, page)
 
+        parser = _ResultHeadingParser()
+        parser.feed(self.client.urlopen(url).read().decode('utf8', 'replace'))
+        parser.close()
+
+        new_ids = []
+        for result_url in parser.links:
+            id_search = _re.search('bill/([^?#]+)', result_url)
+            if id_search is not None:
+                id_val = _re.sub('/', '_', id_search.group(1).strip('/'))
+                if id_val not in new_ids:
+                    new_ids.append(id_val)
+
+        return new_ids
+
+    def _get_data(self, publication_id):
         search_term = _re.sub('_', '/', publication_id)
 
-        text_soup = None
         text_content = None
 
         try:
             text_url = 'https://www.congress.gov/bill/{0}/text'.format(search_term)
-            text_soup = _BeautifulSoup(_urlopen(text_url))
-        except:
-            pass
-
-        if text_soup is not None:
-            if text_soup.find('pre') is not None:
-                text_content = str(text_soup.find('pre'))
-            else:
-                text_content = str(text_soup.find('table', attrs={'class': 'lbexTableStyleEnr'}))
+            text_content = self.parse_text_page(self.client.urlopen(text_url).read())
+        except _HTTPError as e:
+            # some laws have no text page; anything else (after the request layer's retries) is a real failure
+            if e.code not in (404, 410):
+                raise
 
         meta_url = 'https://www.congress.gov/bill/{0}/all-info'.format(search_term)
-        meta_soup = _BeautifulSoup(_urlopen(meta_url))
+        page_meta = self.parse_meta_page(self.client.urlopen(meta_url).read())
+
+        title = page_meta['title']
+
+        if 'amend' in title:
+            amendment = True
+        else:
+            amendment = False
+
+        if 'resolution' in publication_id:
+            subtype = u'resolution'
+        else:
+            subtype = u'law'
+
+        meta = _format_meta_entry(country=u'united_states',
+                                  title=title,
+                                  id=publication_id,
+                                  date=page_meta['date'],
+                                  type=u'annual',
+                                  subtype=subtype,
+                                  amendment=amendment,
+                                  sponsor=page_meta['sponsor'],
+                                  sponsor_party=page_meta['sponsor_party'],
+                                  cosponsors=page_meta['cosponsors'],
+                                  referred=page_meta['referred'],
+                                  hearings=page_meta['hearings'],
+                                  policy_area=page_meta['policy_area'],
+                                  html=text_content)
+
+        return meta
+
+    @staticmethod
+    def parse_text_page(html):
+        """
+        Bill text from a /text page: the <pre> block if there is one, and otherwise the enrolled bill table. The block
+        is cut out of the raw markup and only that slice is parsed, rather than the whole page.
+        """
+
+        markup = _decode_page(html)
+
+        # blocks are located in the page with scripts, styles and comments blanked out, but cut from the page itself
+        masked = _mask_non_text(markup)
+
+        spans = _element_spans(masked, 'pre')
+        if spans:
+            return str(_BeautifulSoup(markup[spans[0][0]:spans[0][1]], 'lxml').find('pre'))
+
+        spans = _element_spans(masked, 'table', r'\bclass\s*=\s*["\']?lbexTableStyleEnr["\'\s>]')
+        if spans:
+            block = markup[spans[0][0]:spans[0][1]]
+            return str(_BeautifulSoup(block, 'lxml').find('table', attrs={'class': 'lbexTableStyleEnr'}))
+
+        return str(None)
+
+    @staticmethod
+    def parse_meta_page(html):
+        """
+        Metadata from an /all-info page. Only the parts of the page that hold metadata are cut out of the raw markup and
+        parsed: the <meta> tags, links to member pages, tables with committee rows, and a short slice following the
+        policy area label. The rest of the page (actions, amendments, related bills...) is never parsed.
+        """
+
+        # scripts, styles and comments are not part of the page text, and may contain markup-like strings
+        markup = _mask_non_text(_decode_page(html))
+
+        meta_soup = _BeautifulSoup('\n'.join(_re.findall(_start_tag_pattern('meta'), markup, _re.I)), 'lxml')
+
+        member_link = _start_tag_pattern('a', r'\bhref\s*=\s*["\']?[^"\'>\s]*member/') + '.*?</a>'
+        link_soup = _BeautifulSoup('\n'.join(_re.findall(member_link, markup, _re.I | _re.S)), 'lxml')
+
+        committee_row = _start_tag_pattern('tr', r'\bclass\s*=\s*["\']?[^"\'>]*\bcommittee\b')
+        committee_tables = [markup[start:end] for start, end in _element_spans(markup, 'table')
+                            if _re.search(committee_row, markup[start:end], _re.I)]
+        committee_soup = _BeautifulSoup('\n'.join(committee_tables), 'lxml')
+
+        return UnitedStates._meta_fields(meta_soup, link_soup, committee_soup, link_soup.text,
+                                         _text_from(markup, 'Policy Area:'))
+
+    @staticmethod
+    def parse_text_page_legacy(html):
+        """ The original full-tree version of parse_text_page, kept as a reference for _benchmarks. """
+
+        text_soup = _BeautifulSoup(html)
+
+        if text_soup.find('pre') is not None:
+            return str(text_soup.find('pre'))
+        else:
+            return str(text_soup.find('table', attrs={'class': 'lbexTableStyleEnr'}))
+
+    @staticmethod
+    def parse_meta_page_legacy(html):
+        """ The original full-tree version of parse_meta_page, kept as a reference for _benchmarks. """
+
+        meta_soup = _BeautifulSoup(html)
+
+        return UnitedStates._meta_fields(meta_soup, meta_soup, meta_soup, meta_soup.text, meta_soup.text)
+
+    @staticmethod
+    def _meta_fields(meta_soup, link_soup, committee_soup, sponsor_text, policy_text):
+        """
+        Metadata fields of an /all-info page, from soups holding its <meta> tags, its member links and its committee
+        tables (the same soup for a full parse), the text to search for the sponsor's party, and the text following
+        the policy area label.
+        """
+        import bs4
 
         title = _re.search(': (.*)', meta_soup.find('meta', attrs={'name': 'dc.title'})['content'])
         if title is not None:
@@ -642,20 +880,20 @@ class UnitedStates(_CountryBase):
         if sponsor is not None:
             sponsor = sponsor['content']
 
-            sponsor_party = _re.search(sponsor + ' \[([A-Z])', meta_soup.text)
+            sponsor_party = _re.search(sponsor + ' \[([A-Z])', sponsor_text)
             if sponsor_party is not None:
                 sponsor_party = sponsor_party.group(1)
         else:
             sponsor_party = None
 
-        cosponsors = [tag.text for tag in meta_soup.find_all('a', href=True)
+        cosponsors = [tag.text for tag in link_soup.find_all('a', href=True)
                       if 'member/' in tag['href'] and sponsor not in tag.text]
 
-        policy_area = _re.search('Policy Area:\s*(.*)', meta_soup.text)
+        policy_area = _re.search('Policy Area:\s*(.*)', policy_text)
         if policy_area is not None:
             policy_area = policy_area.group(1)
 
-        committee_entries = meta_soup.find_all('tr', class_='committee')
+        committee_entries = committee_soup.find_all('tr', class_='committee')
         referred = [entry.find('th').text for entry in committee_entries]
         hearings_held = []
 
@@ -674,32 +912,145 @@ class UnitedStates(_CountryBase):
             hearings = [action for action in actions if 'Hearing' in action]
             hearings_held += [committee_name]*len(hearings)
 
-        if 'amend' in title:
-            amendment = True
-        else:
-            amendment = False
+        return {'title': title, 'date': date, 'sponsor': sponsor, 'sponsor_party': sponsor_party,
+                'cosponsors': cosponsors, 'referred': referred, 'hearings': hearings_held, 'policy_area': policy_area}
 
-        if 'resolution' in publication_id:
-            subtype = u'resolution'
-        else:
-            subtype = u'law'
 
-        meta = _format_meta_entry(country=u'united_states',
-                                  title=title,
-                                  id=publication_id,
-                                  date=date,
-                                  type=u'annual',
-                                  subtype=subtype,
-                                  amendment=amendment,
-                                  sponsor=sponsor,
-                                  sponsor_party=sponsor_party,
-                                  cosponsors=cosponsors,
-                                  referred=referred,
-                                  hearings=hearings_held,
-                                  policy_area=policy_area,
-                                  html=text_content)
+class _ResultHeadingParser(_HTMLParser):
+    def __init__(self):
+        """ Collects the link of each search result (<span class="result-heading"><a href=...>) on a results page. """
 
-        return meta
+        _HTMLParser.__init__(self)
+
+        self.links = []
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == 'span':
+            if self._depth:
+                self._depth += 1
+            elif 'result-heading' in (attrs.get('class') or '').split():
+                self._depth = 1
+
+        elif tag == 'a' and self._depth and attrs.get('href'):
+            self.links.append(attrs['href'])
+
+    def handle_endtag(self, tag):
+        if tag == 'span' and self._depth:
+            self._depth -= 1
+
+
+def _next_page_links(html):
+    """
+    hrefs of the "Next Page" links on a parl.gc.ca publication page, in page order. Each <a>...</a> element is matched
+    in the raw markup, so finding the next page does not need a parse of the whole page.
+    """
+
+    links = []
+
+    for anchor in _re.finditer(r'<a\b[^>]*>.*?</a>', html, _re.I | _re.S):
+        if 'Next Page' in anchor.group(0):
+            href = _re.search(r'href\s*=\s*["\']?([^"\'>\s]*)', anchor.group(0), _re.I)
+            links.append(href.group(1) if href is not None else '')
+
+    return links
+
+
+def _labelled_links(html, label):
+    """
+    hrefs of the links on a page whose text contains label, in page order, with character references decoded as in a
+    parsed tree. Like _next_page_links, each <a>...</a> element is matched in the raw markup (outside scripts, styles
+    and comments) instead of parsing the whole page.
+    """
+
+    links = []
+
+    anchor_pattern = r'(' + _start_tag_pattern('a') + r')(.*?)</a\s*>'
+
+    for anchor in _re.finditer(anchor_pattern, _mask_non_text(_decode_page(html)), _re.I | _re.S):
+        if label in _re.sub(r'<[^>]*>', '', anchor.group(2)):
+            href = _re.search(r'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^"\'>\s]*))', anchor.group(1), _re.I)
+            if href is not None:
+                links.append(_HTMLParser().unescape(next(group for group in href.groups() if group is not None)))
+
+    return links
+
+
+def _decode_page(html):
+    """ Page markup as unicode, decoded as BeautifulSoup would decode the whole page. """
+
+    if isinstance(html, unicode):
+        return html
+
+    return _UnicodeDammit(html, is_html=True).unicode_markup
+
+
+def _start_tag_pattern(tag, attr_pattern=None):
+    """ Regex for a start tag, allowing quoted attribute values that contain '>'. If given, attr_pattern must match. """
+
+    if attr_pattern is None:
+        return r'<' + tag + r'\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+
+    return r'<' + tag + r'\b(?=(?:[^>"\']|"[^"]*"|\'[^\']*\')*?' + attr_pattern + r')(?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+
+
+def _mask_non_text(markup):
+    """
+    Markup with every script and style element and every comment replaced by spaces of the same length, so that
+    regexes over the page only see real elements and text, and positions still line up with the original markup.
+    """
+
+    return _re.sub(r'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->',
+                   lambda match: ' ' * len(match.group(0)), markup, flags=_re.I | _re.S)
+
+
+def _element_spans(markup, tag, attr_pattern=None):
+    """
+    (start, end) positions in markup of every outermost tag element whose start tag matches attr_pattern, from its
+    start tag to its matching end tag (or to the end of the page, if it is never closed).
+    """
+
+    spans = []
+    depth = 0
+    start = None
+
+    for match in _re.finditer(r'(' + _start_tag_pattern(tag) + r')|</' + tag + r'\s*>', markup, _re.I):
+        if match.group(1) is not None:
+            if depth == 0:
+                if attr_pattern is not None and not _re.search(attr_pattern, match.group(1), _re.I):
+                    continue
+                start = match.start()
+
+            depth += 1
+
+        elif depth:
+            depth -= 1
+
+            if depth == 0:
+                spans.append((start, match.end()))
+
+    if depth:
+        spans.append((start, len(markup)))
+
+    return spans
+
+
+def _text_from(markup, label, length=4096):
+    """
+    Text of the markup starting at the first text node containing label, parsed from a slice of at most length
+    characters. Empty if the label does not appear in the page text. Scripts, styles and comments should already be
+    masked out (see _mask_non_text).
+    """
+
+    match = _re.search(r'>[^<]*' + _re.escape(label), markup)
+    if match is None:
+        return ''
+
+    start = match.start() + 1
+
+    return _BeautifulSoup(markup[start:start + length], 'lxml').text
 
 
 def _format_meta_entry(**kwargs):
@@ -3,30 +3,33 @@ import os as _os
 import re as _re
 import shutil as _shutil
 import tempfile as _tempfile
-import urllib as _urllib
-import urllib2 as _urllib2
 import zipfile as _zipfile
 
 from bs4 import BeautifulSoup as _BeautifulSoup
 
+from _download_log import IdRegistry as _IdRegistry
+from _download_log import IdSet as _IdSet
+from _http import default_client as _default_client
+
 
 class _CountryBase:
-    def __init__(self, log_data, country, base_path):
-        self.new_ids = []
+    def __init__(self, log_data, country, base_path, client=None):
+        self.new_ids = _IdSet()
 
         self.log_data = log_data
         self.country = country
+        self.client = client if client is not None else _default_client()
         self.data_path = _os.path.join(base_path, 'Legislation', country, 'Consolidated')
 
-        if 'Consolidated' not in self.log_data:
-            self.log_data['Consolidated'] = {country: []}
+        self.known_ids = _IdRegistry(self.log_data).namespace('Consolidated', country)
 
         for id_val in self._get_version_ids():
-            if id_val not in self.log_data['Consolidated'][country]:
+            if id_val not in self.known_ids:
                 self.new_ids.append(id_val)
 
         # change here later - 2017 not complete
-        self.new_ids = [id_val for id_val in self.new_ids if id_val != '2017']
+        if '2017' in self.new_ids:
+            self.new_ids.remove('2017')
 
     def update_code(self):
         for id_val in self.new_ids:
@@ -50,7 +53,7 @@ class _CountryBase:
 class UnitedStates(_CountryBase):
     def _get_version_ids(self):
         base_url = 'http://uscode.house.gov/download/annualhistoricalarchives/downloadxhtml.shtml'
-        soup = _BeautifulSoup(_urllib2.urlopen(base_url))
+        soup = _BeautifulSoup(self.client.urlopen(base_url))
 
         tags = [t for t in soup.find_all('a') if '.zip' in t['href']]
 
@@ -62,7 +65,7 @@ class UnitedStates(_CountryBase):
         dl_url = 'http://uscode.house.gov/download/annualhistoricalarchives/XHTML/' + publication_id + '.zip'
         zip_path = _os.path.join(_tempfile.gettempdir(), self.country + publication_id + '.zip')
 
-        _urllib.urlretrieve(dl_url, zip_path)
+        self.client.urlretrieve(dl_url, zip_path)
 
         with _zipfile.ZipFile(zip_path, 'r') as zip_ref:
             zip_ref.extractall(_tempfile.gettempdir())
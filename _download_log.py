@@ -0,0 +1,232 @@
+import json as _json
+import os as _os
+import time as _time
+
+
+class LogJournal:
+    def __init__(self, log_path, compact_every=500):
+        """
+        Journaled storage for the download log. The log itself is kept as a JSON snapshot at log_path; completed IDs
+        are appended as one small JSON record per line to a journal file next to it, and folded back into the snapshot
+        every compact_every records. At startup, the snapshot is read and the journal replayed on top of it.
+
+        :param log_path: path to the JSON snapshot (log.json).
+        :param compact_every: number of journal records to accumulate before rewriting the snapshot.
+        :return:
+        """
+
+        self.log_path = log_path
+        self.journal_path = log_path + '.journal'
+        self.compact_every = compact_every
+
+        self.pending = 0
+        self._journal = None
+
+    def load(self):
+        """ Read the snapshot, replay any journaled records on top of it, and return the resulting log data. """
+
+        if _os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                log_data = _json.loads(f.read())
+        else:
+            log_data = {'last updated': None}
+
+        if _os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    # a crash mid-append can leave a partial last line, which is simply dropped
+                    try:
+                        record = _json.loads(line)
+                    except ValueError:
+                        continue
+
+                    _apply_record(log_data, record)
+                    self.pending += 1
+
+        return log_data
+
+    def record(self, collection, country, id_val):
+        """ Append a single completed ID to the journal. """
+
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'ab')
+
+        self._journal.write(_json.dumps({'collection': collection, 'country': country, 'id': id_val}) + '\n')
+        self._journal.flush()
+        _os.fsync(self._journal.fileno())
+
+        self.pending += 1
+
+    def due(self):
+        return self.pending >= self.compact_every
+
+    def compact(self, log_data):
+        """
+        Write log_data as a new snapshot and truncate the journal. The snapshot is written to a temporary file and
+        renamed into place, so a crash leaves either the old or the new snapshot intact. log_data must already
+        include every journaled record.
+        """
+
+        temp_path = self.log_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_json.dumps(log_data))
+            f.flush()
+            _os.fsync(f.fileno())
+
+        _os.rename(temp_path, self.log_path)
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+        if _os.path.exists(self.journal_path):
+            _os.remove(self.journal_path)
+
+        self.pending = 0
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class IdRegistry:
+    def __init__(self, log_data):
+        """
+        Indexed view of the downloaded IDs held in the log. IDs are namespaced by collection ('Annual',
+        'Consolidated') and country, as in the JSON log itself.
+
+        :param log_data: log dictionary, as loaded by LogJournal.
+        :return:
+        """
+
+        self.log_data = log_data
+
+    def namespace(self, collection, country):
+        """ Return the ID set for a collection and country, installing it in the log in place of the plain list. """
+
+        collection_data = self.log_data.setdefault(collection, {})
+
+        ids = collection_data.get(country)
+        if not isinstance(ids, IdSet):
+            ids = IdSet(ids or [])
+            collection_data[country] = ids
+
+        return ids
+
+
+class IdSet(list):
+    def __init__(self, ids=()):
+        """
+        List of IDs backed by a hash index, so membership checks run in constant time and repeated IDs are only
+        stored once. Serializes to JSON as a plain list, keeping the log format unchanged. Every list operation that
+        adds or removes items keeps the index in step.
+        """
+
+        list.__init__(self)
+        self._index = set()
+
+        self.extend(ids)
+
+    def __contains__(self, id_val):
+        return id_val in self._index
+
+    def append(self, id_val):
+        if id_val not in self._index:
+            self._index.add(id_val)
+            list.append(self, id_val)
+
+    def extend(self, ids):
+        for id_val in ids:
+            self.append(id_val)
+
+    def insert(self, i, id_val):
+        if id_val not in self._index:
+            self._index.add(id_val)
+            list.insert(self, i, id_val)
+
+    def remove(self, id_val):
+        list.remove(self, id_val)
+        self._index.discard(id_val)
+
+    def pop(self, i=-1):
+        id_val = list.pop(self, i)
+        self._index.discard(id_val)
+
+        return id_val
+
+    def __iadd__(self, ids):
+        self.extend(ids)
+
+        return self
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._reindex()
+
+        return self
+
+    def __setitem__(self, i, value):
+        list.__setitem__(self, i, value)
+        self._reindex()
+
+    def __setslice__(self, i, j, ids):
+        list.__setslice__(self, i, j, ids)
+        self._reindex()
+
+    def __delitem__(self, i):
+        list.__delitem__(self, i)
+        self._reindex()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._reindex()
+
+    def _reindex(self):
+        """ Rebuild the index after an arbitrary change to the list, dropping any repeated IDs the change introduced. """
+
+        ids = list(self)
+
+        list.__delslice__(self, 0, len(self))
+        self._index = set()
+
+        self.extend(ids)
+
+
+def _apply_record(log_data, record):
+    IdRegistry(log_data).namespace(record['collection'], record['country']).append(record['id'])
+
+
+class DiscoveryLog:
+    def __init__(self, log_data, country):
+        """
+        Per-session discovery watermarks for a country (a congress, a year, ...), kept in the log under 'Discovery'.
+        Each session records when it was last listed, whether it was closed (no new legislation possible) at that
+        point, and anything else the scraper wants to keep about it. Closed sessions need never be listed again.
+
+        Updates are held back until commit(), which the scraper calls once every ID discovered has been downloaded;
+        an interrupted run therefore lists the same sessions again rather than skipping IDs it never fetched.
+
+        :param log_data: log dictionary, as loaded by LogJournal.
+        :param country: country name, as used for the 'Annual' IDs.
+        :return:
+        """
+
+        self.sessions = log_data.setdefault('Discovery', {}).setdefault(country, {})
+        self.updates = {}
+
+    def is_closed(self, session):
+        return self.sessions.get(str(session), {}).get('closed', False)
+
+    def get(self, session):
+        return self.sessions.get(str(session))
+
+    def checked(self, session, closed, **info):
+        """ Record that a session has been listed, and whether it was already closed when it was. """
+
+        info.update({'closed': closed, 'checked': _time.strftime('%Y-%m-%dT%H:%M:%S')})
+        self.updates[str(session)] = info
+
+    def commit(self):
+        self.sessions.update(self.updates)
+        self.updates = {}
@@ -0,0 +1,90 @@
+import hashlib as _hashlib
+import json as _json
+
+import _graph_metrics
+from _corpus_store import CorpusStore as _CorpusStore
+
+
+METRICS = ['total_nodes', 'total_edges', 'clustering', 'average_degree']
+
+
+class ResultStore:
+    def __init__(self, store_dir):
+        """
+        Persistent store of entity extraction results, keyed by a hash of the parsed text they were computed from, so
+        a chapter whose text has not changed since an earlier edition (or an earlier run) is looked up rather than
+        extracted again. Each result holds the network statistics and the co-mention graph as networkx adjacency
+        data. Records are kept in a CorpusStore.
+
+        :param store_dir: directory holding the store; one per extractor and tagger, since results depend on both.
+        :return:
+        """
+
+        self.store = _CorpusStore(store_dir)
+
+    @staticmethod
+    def content_key(parsed):
+        """ Hash of a document's parsed text, independent of dictionary ordering. """
+
+        return _hashlib.sha1(_json.dumps(parsed, sort_keys=True)).hexdigest()
+
+    def __contains__(self, key):
+        return key in self.store
+
+    def get(self, key):
+        """ Stored result for a content key, or None. """
+
+        if key not in self.store:
+            return None
+
+        return self.store.get(key)
+
+    def put(self, key, result):
+        """ Store the output of do_entity_extraction, with the graph converted to adjacency data. Returns the record. """
+        from networkx.readwrite import json_graph
+
+        graph = _graph_metrics.result_graph(result)
+
+        record = {k: result[k] for k in METRICS}
+        record['graph'] = json_graph.adjacency_data(graph) if graph else None
+
+        self.store.put(key, record)
+
+        return record
+
+    def close(self):
+        self.store.close()
+
+
+class SectionStore:
+    def __init__(self, store_dir):
+        """
+        Persistent store of the entities tagged in each unit of analysis (e.g. a U.S. Code section), keyed by a hash
+        of its text, so that sections carried over unchanged between editions are only tagged once.
+
+        :param store_dir: directory holding the store; one per tagger.
+        :return:
+        """
+
+        self.store = _CorpusStore(store_dir)
+
+    @staticmethod
+    def content_key(chunk):
+        if isinstance(chunk, unicode):
+            chunk = chunk.encode('utf8')
+
+        return _hashlib.sha1(chunk).hexdigest()
+
+    def __contains__(self, key):
+        return key in self.store
+
+    def get(self, key):
+        """ Entity strings tagged in a section. """
+
+        return self.store.get(key)
+
+    def put(self, key, entities):
+        self.store.put(key, entities)
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,130 @@
+import os as _os
+from collections import deque as _deque
+
+
+AGENCY_LIST = _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), 'agency_list.txt')
+
+
+class GazetteerTagger:
+    def __init__(self, names, tokenize=None, case_sensitive=True):
+        """
+        Dictionary-based entity tagger. The names are tokenized and compiled into an Aho-Corasick automaton over
+        tokens, so every name occurring in a sentence is found in a single pass over it, regardless of how many names
+        there are. Overlapping matches are resolved leftmost-longest, and matches are emitted as B-MISC/I-MISC tags,
+        as produced by the LSTM tagger.
+
+        :param names: iterable of entity names (e.g. the contents of agency_list.txt).
+        :param tokenize: function splitting a name into tokens; should match the tokenization of the tagged sentences.
+                         Defaults to splitting on whitespace.
+        :param case_sensitive: if False, names and sentences are matched ignoring case.
+        :return:
+        """
+
+        self.tokenize = tokenize if tokenize is not None else lambda name: name.split()
+        self.case_sensitive = case_sensitive
+
+        # trie over tokens: per-node transitions, failure links, and lengths of the names ending at each node
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for name in names:
+            tokens = [self._normalize(token) for token in self.tokenize(name.strip())]
+            if tokens:
+                self._add(tokens)
+
+        self._link()
+
+    @classmethod
+    def from_file(cls, path=AGENCY_LIST, tokenize=None, case_sensitive=True):
+        """ Build a tagger from a file with one name per line. """
+
+        with open(path, 'rb') as f:
+            names = [line.decode('utf8') for line in f if line.strip()]
+
+        return cls(names, tokenize, case_sensitive)
+
+    def tag_sentences(self, sentences):
+        """ Tag a list of tokenized sentences, returning one list of tags per sentence. """
+
+        return [self.predict(sent) for sent in sentences]
+
+    def predict(self, sent):
+        """ Tag a single tokenized sentence. """
+
+        tags = ['O'] * len(sent)
+
+        for start, length in self.matches(sent):
+            tags[start] = 'B-MISC'
+            for i in range(start + 1, start + length):
+                tags[i] = 'I-MISC'
+
+        return tags
+
+    def matches(self, sent):
+        """ Return the (start, length) of each name found in a tokenized sentence, leftmost-longest. """
+
+        # longest name starting at each position
+        longest = [0] * len(sent)
+
+        state = 0
+        for i, token in enumerate(sent):
+            token = self._normalize(token)
+
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+
+            for length in self.output[state]:
+                start = i - length + 1
+                if length > longest[start]:
+                    longest[start] = length
+
+        out = []
+
+        i = 0
+        while i < len(sent):
+            if longest[i]:
+                out.append((i, longest[i]))
+                i += longest[i]
+            else:
+                i += 1
+
+        return out
+
+    def _normalize(self, token):
+        return token if self.case_sensitive else token.lower()
+
+    def _add(self, tokens):
+        state = 0
+
+        for token in tokens:
+            if token not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][token] = len(self.goto) - 1
+
+            state = self.goto[state][token]
+
+        if len(tokens) not in self.output[state]:
+            self.output[state].append(len(tokens))
+
+    def _link(self):
+        """ Breadth-first construction of failure links, merging each node's outputs with those of its fail node. """
+
+        queue = _deque(self.goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for token, child in self.goto[state].items():
+                queue.append(child)
+
+                fail = self.fail[state]
+                while fail and token not in self.goto[fail]:
+                    fail = self.fail[fail]
+
+                self.fail[child] = self.goto[fail].get(token, 0)
+                self.output[child] += [length for length in self.output[self.fail[child]]
+                                       if length not in self.output[child]]
@@ -0,0 +1,88 @@
+def edge_arrays(edges):
+    """
+    Compact representation of a weighted co-mention graph: node names in order of first appearance, and parallel
+    arrays of source index, target index and weight for each edge.
+
+    :param edges: list of (entity, entity, weight) tuples, one per pair.
+    :return: (nodes, sources, targets, weights).
+    """
+
+    import numpy as np
+
+    node_ids = {}
+    nodes = []
+    sources = []
+    targets = []
+
+    for u, v, _ in edges:
+        for node in (u, v):
+            if node not in node_ids:
+                node_ids[node] = len(nodes)
+                nodes.append(node)
+
+        sources.append(node_ids[u])
+        targets.append(node_ids[v])
+
+    weights = np.array([w for _, _, w in edges], dtype=np.float64)
+
+    return nodes, np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64), weights
+
+
+def weighted_degree(n_nodes, sources, targets, weights):
+    """ Sum of incident edge weights for each node. """
+
+    import numpy as np
+
+    return (np.bincount(sources, weights, minlength=n_nodes) +
+            np.bincount(targets, weights, minlength=n_nodes))
+
+
+def average_clustering(n_nodes, sources, targets, weights):
+    """
+    Average weighted clustering coefficient over all nodes, zeros included, as in networkx's
+    average_clustering(weight='weight', count_zeros=True). With weights scaled by the largest weight and
+    A = (w / max w) ** (1/3) as a sparse symmetric matrix, the weighted triangles through node u are diag(A^3)_u,
+    and c_u = diag(A^3)_u / (deg(u) (deg(u) - 1)). A graph without nodes has clustering 0.
+    """
+
+    import numpy as np
+    from scipy import sparse
+
+    if not n_nodes:
+        return 0
+
+    scaled = (weights / weights.max()) ** (1 / 3.)
+
+    adjacency = sparse.csr_matrix((np.concatenate([scaled, scaled]),
+                                   (np.concatenate([sources, targets]), np.concatenate([targets, sources]))),
+                                  shape=(n_nodes, n_nodes))
+
+    # diag(A^3) without forming A^3: row sums of (A A) * A, elementwise, since A is symmetric
+    triangles = np.asarray(adjacency.dot(adjacency).multiply(adjacency).sum(axis=1)).ravel()
+
+    n_neighbors = (np.bincount(sources, minlength=n_nodes) +
+                   np.bincount(targets, minlength=n_nodes)).astype(np.float64)
+
+    possible = n_neighbors * (n_neighbors - 1)
+    clustering = np.zeros(n_nodes)
+    np.divide(triangles, possible, out=clustering, where=possible > 0)
+
+    return float(clustering.mean())
+
+
+def result_graph(result):
+    """ networkx graph of an extraction result's co-mention edges, or None for a result without entities. """
+
+    return to_networkx(result['edges']) if result['total_nodes'] else None
+
+
+def to_networkx(edges):
+    """ Build a networkx graph from (entity, entity, weight) tuples, for callers that need one. """
+
+    import networkx as nx
+
+    graph = nx.Graph()
+    for u, v, w in edges:
+        graph.add_edge(u, v, weight=w)
+
+    return graph
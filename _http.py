@@ -0,0 +1,843 @@
+import errno as _errno
+import hashlib as _hashlib
+import httplib as _httplib
+import json as _json
+import os as _os
+import random as _random
+import shutil as _shutil
+import socket as _socket
+import tempfile as _tempfile
+import threading as _threading
+import time as _time
+import urllib2 as _urllib2
+import urlparse as _urlparse
+from StringIO import StringIO as _StringIO
+
+
+# maximum number of requests in flight to any single host, shared by all scraper threads
+_host_limit = 2
+_host_slots = {}
+_slots_lock = _threading.Lock()
+
+# sustained request rate (per second) and burst size allowed for each host; a rate of None disables rate limiting
+_host_rate = 2.
+_host_burst = 4
+_host_buckets = {}
+
+# retries for transient failures, with exponential backoff (full jitter) between base and max delay, in seconds
+_max_retries = 5
+_retry_base = 1.
+_retry_max = 120.
+
+# HTTP statuses worth retrying; 429 and 503 also slow the host's request rate
+_TRANSIENT_CODES = (408, 429, 500, 502, 503, 504)
+_THROTTLE_CODES = (429, 503)
+
+# on-disk response cache shared by all scrapers; None disables caching
+_cache = None
+
+# keep-alive client used by the module-level urlopen/urlretrieve
+_default_client = None
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_USER_AGENT = 'Python-urllib/' + _urllib2.__version__
+
+
+def set_host_limit(limit):
+    """ Set the maximum number of concurrent requests per host. Applies to hosts not yet contacted. """
+
+    global _host_limit
+
+    with _slots_lock:
+        _host_limit = limit
+        _host_slots.clear()
+
+
+def host_limit():
+    """ The current maximum number of concurrent requests per host. """
+
+    return _host_limit
+
+
+def set_rate_limit(rate, burst=None):
+    """
+    Set the polite request rate for each host. Requests beyond it wait for the host's token bucket to refill; the
+    rate is halved whenever a host signals overload (429/503), and recovers gradually as requests succeed.
+
+    :param rate: sustained requests per second per host, or None for no limit.
+    :param burst: number of requests that may be made back to back after an idle period. Defaults to twice the rate.
+    """
+
+    global _host_rate, _host_burst
+
+    with _slots_lock:
+        _host_rate = rate
+        _host_burst = burst if burst is not None else max(1, int(2 * (rate or 0)))
+        _host_buckets.clear()
+
+
+def set_retry_policy(max_retries=5, base_delay=1., max_delay=120.):
+    """
+    Set how transient failures (connection errors, timeouts, 408/429/5xx responses) are retried. The wait before
+    retry n is drawn uniformly from [0, min(max_delay, base_delay * 2 ** n)], unless the server asks for a longer wait
+    with Retry-After. Permanent failures (e.g. 404) are raised straight away.
+    """
+
+    global _max_retries, _retry_base, _retry_max
+
+    _max_retries = max_retries
+    _retry_base = base_delay
+    _retry_max = max_delay
+
+
+def is_transient(error):
+    """ Whether a request error is worth retrying. """
+
+    if isinstance(error, CacheMissError):
+        return False
+    if isinstance(error, _urllib2.HTTPError):
+        return error.code in _TRANSIENT_CODES
+
+    return isinstance(error, (_urllib2.URLError, _socket.error, _httplib.HTTPException))
+
+
+def configure_cache(cache_dir, max_bytes=20 * 1024 ** 3, replay=False):
+    """
+    Route all scraper requests through an on-disk response cache.
+
+    :param cache_dir: directory holding the cache. None disables caching.
+    :param max_bytes: size bound for cached bodies; least recently used responses are evicted beyond it.
+    :param replay: if True, never touch the network - serve every request from the cache, and raise CacheMissError
+                   for anything not cached.
+    """
+
+    global _cache
+
+    if cache_dir is None:
+        _cache = None
+    else:
+        _cache = ResponseCache(cache_dir, max_bytes, replay)
+
+
+def urlopen(url, timeout=60):
+    """ urlopen through the shared default client (see HttpClient.urlopen). """
+
+    return default_client().urlopen(url, timeout)
+
+
+def urlretrieve(url, filename, timeout=60):
+    """ urlretrieve through the shared default client (see HttpClient.urlretrieve). """
+
+    return default_client().urlretrieve(url, filename, timeout)
+
+
+def default_client():
+    """ HttpClient shared by callers that are not handed one of their own. """
+
+    global _default_client
+
+    with _slots_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+
+        return _default_client
+
+
+class HttpClient(object):
+    def __init__(self, pool_size=None, max_redirects=10):
+        """
+        Keep-alive HTTP client used by the scrapers. Connections are kept open between requests, in a bounded pool for
+        each host, so a long crawl reuses a few TCP/TLS connections per host rather than opening one per request.
+        Requests go through the response cache, rate limits and retries configured in this module. One client is
+        meant to be shared by every scraper (and thread) in a run.
+
+        :param pool_size: maximum number of connections open to any one host. Defaults to the per-host request limit
+                          (see set_host_limit) at the time the host is first contacted.
+        :param max_redirects: number of redirects followed before giving up on a request.
+        :return:
+        """
+
+        self.pool_size = pool_size
+        self.max_redirects = max_redirects
+
+        self._pools = {}
+        self._lock = _threading.Lock()
+
+    def urlopen(self, url, timeout=60):
+        """
+        Drop-in replacement for urllib2.urlopen. The body is read in full while holding one of the host's request
+        slots, so that concurrent workers never exceed the per-host limit, and returned as an in-memory response.
+        Requests are paced by the host's rate limit, and transient failures retried with backoff. If a cache is
+        configured, cached responses are revalidated with ETag/Last-Modified rather than downloaded again.
+        """
+
+        cache = _cache
+        entry = _cached_entry(cache, url)
+
+        if entry is not None and cache.replay:
+            return _replayed(cache.response(entry), url)
+
+        try:
+            response, body = _fetch(self._open, url, entry, timeout, _read_all)
+        except _urllib2.HTTPError as e:
+            if e.code != 304 or entry is None:
+                raise
+
+            cached = cache.response(entry)
+            if cached is not None:
+                return cached
+
+            # the body was evicted while revalidating, so fetch it again unconditionally
+            response, body = _fetch(self._open, url, None, timeout, _read_all)
+
+        headers = dict(response.info().items())
+        if cache is not None:
+            cache.store(url, body, headers, response.geturl())
+
+        return _Response(body, response.geturl(), headers, response.getcode())
+
+    def urlretrieve(self, url, filename, timeout=60):
+        """ Drop-in replacement for urllib.urlretrieve, streaming the body to filename and caching it like urlopen. """
+
+        cache = _cache
+        entry = _cached_entry(cache, url)
+
+        if entry is not None and cache.replay:
+            _replayed(cache.copy(entry, filename), url)
+            return filename, entry['headers']
+
+        def save(response):
+            with open(filename, 'wb') as f:
+                _shutil.copyfileobj(response, f, 1024 * 1024)
+
+        try:
+            response, _ = _fetch(self._open, url, entry, timeout, save)
+        except _urllib2.HTTPError as e:
+            if e.code != 304 or entry is None:
+                raise
+
+            if cache.copy(entry, filename):
+                return filename, entry['headers']
+
+            # the body was evicted while revalidating, so fetch it again unconditionally
+            response, _ = _fetch(self._open, url, None, timeout, save)
+
+        headers = dict(response.info().items())
+        if cache is not None:
+            cache.store_file(url, filename, headers, response.geturl())
+
+        return filename, headers
+
+    def close(self):
+        """ Close every idle connection. The client can still be used afterwards. """
+
+        with self._lock:
+            pools = list(self._pools.values())
+
+        for pool in pools:
+            pool.close()
+
+    def _open(self, url, headers, timeout):
+        """
+        GET url on a pooled connection, following redirects. Error statuses (and 304) are raised as urllib2.HTTPError,
+        as urllib2.urlopen would; the connection goes back to the pool once the response is read and closed.
+        """
+
+        for _ in range(self.max_redirects + 1):
+            response = self._request(url, headers, timeout)
+            code = response.getcode()
+            location = response.info().get('Location')
+
+            if code < 400 and code != 304 and code not in _REDIRECT_CODES:
+                return response
+
+            # error and redirect bodies are small; reading them lets the connection be reused
+            body = response.read()
+            response.close()
+
+            if code in _REDIRECT_CODES and location:
+                url = _urlparse.urljoin(url, location)
+            else:
+                raise _urllib2.HTTPError(url, code, response.reason, response.info(), _StringIO(body))
+
+        raise _urllib2.HTTPError(url, code, 'Too many redirects', response.info(), _StringIO(body))
+
+    def _request(self, url, headers, timeout):
+        parts = _urlparse.urlsplit(url)
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        pool = self._pool(parts.scheme, parts.netloc)
+        connection = pool.acquire(timeout)
+
+        try:
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+            except (_httplib.HTTPException, _socket.error):
+                if not connection.reused:
+                    raise
+
+                # the server may have dropped an idle connection; try once more on a fresh one
+                connection.close()
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+        except Exception as e:
+            pool.release(connection, False)
+
+            # as urllib2 does, so callers can keep catching URLError
+            if isinstance(e, _socket.error):
+                raise _urllib2.URLError(e)
+            raise
+
+        return _PooledResponse(response, url, pool, connection)
+
+    def _pool(self, scheme, netloc):
+        if scheme not in ('http', 'https'):
+            raise _urllib2.URLError('unsupported URL scheme: ' + scheme)
+
+        with self._lock:
+            if (scheme, netloc) not in self._pools:
+                size = self.pool_size if self.pool_size is not None else _host_limit
+                self._pools[(scheme, netloc)] = _ConnectionPool(scheme, netloc, size)
+
+            return self._pools[(scheme, netloc)]
+
+
+class _ConnectionPool:
+    def __init__(self, scheme, netloc, size):
+        """
+        Connections to one host. At most size connections are open at once (callers beyond that wait for one to be
+        released), and released connections are kept for reuse, most recently used first.
+        """
+
+        self.connection_class = _httplib.HTTPSConnection if scheme == 'https' else _httplib.HTTPConnection
+        self.netloc = netloc
+
+        self._idle = []
+        self._slots = _threading.BoundedSemaphore(size)
+        self._lock = _threading.Lock()
+
+    def acquire(self, timeout):
+        self._slots.acquire()
+
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+
+        if connection is None:
+            connection = self.connection_class(self.netloc, timeout=timeout)
+            connection.reused = False
+        else:
+            connection.reused = True
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+
+        return connection
+
+    def release(self, connection, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for connection in idle:
+            connection.close()
+
+
+class _PooledResponse:
+    def __init__(self, response, url, pool, connection):
+        """ httplib response with the urllib2 response interface, handing its connection back to the pool on close. """
+
+        self._response = response
+        self._pool = pool
+        self._connection = connection
+
+        self.url = url
+        self.reason = response.reason
+
+    def read(self, size=None):
+        if size is None or size < 0:
+            return self._response.read()
+
+        return self._response.read(size)
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self._response.msg
+
+    def getcode(self):
+        return self._response.status
+
+    def close(self):
+        if self._connection is None:
+            return
+
+        # only a connection whose response was read to the end, and that the server keeps open, can be reused
+        reusable = self._response.isclosed() and not self._response.will_close
+        if not reusable:
+            self._response.close()
+
+        self._pool.release(self._connection, reusable)
+        self._connection = None
+
+
+def _fetch(opener, url, entry, timeout, consume):
+    """
+    Make a (conditional) request with opener and pass the response to consume, within the host's concurrency and rate
+    limits. Transient failures - including ones while reading the body - are retried with backoff; the host slot is
+    released while waiting. Returns the response and the result of consume.
+    """
+
+    bucket = _host_bucket(url)
+
+    attempt = 0
+    while True:
+        with _host_slot(url):
+            if bucket is not None:
+                bucket.acquire()
+
+            try:
+                response = opener(url, _request_headers(entry), timeout)
+                try:
+                    result = consume(response)
+                finally:
+                    response.close()
+
+            except Exception as e:
+                if isinstance(e, _urllib2.HTTPError) and e.code == 304:
+                    raise
+                if attempt >= _max_retries or not is_transient(e):
+                    raise
+
+                delay = _retry_delay(e, attempt)
+                if bucket is not None and isinstance(e, _urllib2.HTTPError) and e.code in _THROTTLE_CODES:
+                    bucket.throttle(delay)
+
+            else:
+                if bucket is not None:
+                    bucket.succeed()
+
+                return response, result
+
+        print('Retrying {0} in {1:.1f}s ({2})'.format(url, delay, e))
+        _time.sleep(delay)
+
+        attempt += 1
+
+
+def _read_all(response):
+    """ Read a response body, treating a body shorter than its Content-Length as a (retryable) failed read. """
+
+    body = response.read()
+
+    expected = response.info().get('Content-Length')
+    if expected is not None and expected.isdigit() and len(body) < int(expected):
+        raise _httplib.IncompleteRead(body, int(expected) - len(body))
+
+    return body
+
+
+def _retry_delay(error, attempt):
+    delay = _random.uniform(0, min(_retry_max, _retry_base * 2 ** attempt))
+
+    if isinstance(error, _urllib2.HTTPError) and error.code in _THROTTLE_CODES:
+        retry_after = _retry_after(error.info().get('Retry-After'))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, _retry_max))
+
+    return delay
+
+
+def _retry_after(value):
+    """ Seconds to wait from a Retry-After header, given either as a number of seconds or as an HTTP date. """
+    import email.utils
+
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+
+    return max(0., email.utils.mktime_tz(parsed) - _time.time())
+
+
+class CacheMissError(_urllib2.URLError):
+    """ Raised in replay mode for a request that is not in the response cache. """
+
+
+def _cached_entry(cache, url):
+    if cache is None:
+        return None
+
+    entry = cache.lookup(url)
+    if entry is None and cache.replay:
+        raise CacheMissError('not in response cache: ' + url)
+
+    return entry
+
+
+def _replayed(result, url):
+    """ Pass through a cache read in replay mode, raising CacheMissError if the body was not there after all. """
+
+    if not result:
+        raise CacheMissError('body missing from response cache: ' + url)
+
+    return result
+
+
+def _request_headers(entry):
+    headers = {'User-Agent': _USER_AGENT}
+
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    return headers
+
+
+def _host_slot(url):
+    host = _urlparse.urlparse(url).netloc
+
+    with _slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = _threading.BoundedSemaphore(_host_limit)
+
+        return _host_slots[host]
+
+
+def _host_bucket(url):
+    host = _urlparse.urlparse(url).netloc
+
+    with _slots_lock:
+        if _host_rate is None:
+            return None
+
+        if host not in _host_buckets:
+            _host_buckets[host] = _TokenBucket(_host_rate, _host_burst)
+
+        return _host_buckets[host]
+
+
+class _TokenBucket:
+    def __init__(self, rate, burst):
+        """
+        Per-host request pacing. Tokens accumulate at the current rate, up to burst, and each request takes one. The
+        rate is halved (down to 1/16 of the configured rate) when the host signals overload and raised by a tenth of the
+        configured rate after each success, so throughput settles just under what the host tolerates.
+        """
+
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = burst
+
+        self.tokens = float(burst)
+        self.updated = _time.time()
+        self.blocked_until = 0.
+
+        self._lock = _threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = _time.time()
+
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            _time.sleep(wait)
+
+    def throttle(self, delay=0.):
+        with self._lock:
+            self.rate = max(self.rate / 2, self.max_rate / 16)
+            self.blocked_until = max(self.blocked_until, _time.time() + delay)
+
+    def succeed(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_bytes, replay=False):
+        """
+        Content-addressed HTTP response cache. Bodies are stored once per SHA-1 digest under blobs/, and each URL gets
+        a small metadata record under meta/ pointing at its body, along with the validators (ETag, Last-Modified)
+        needed to revalidate it. Total body size is kept under max_bytes by evicting the least recently used URLs. Each
+        hit touches the URL's metadata file, so its modification time records the last use across runs.
+
+        :param cache_dir: directory holding the cache; created if necessary.
+        :param max_bytes: size bound for stored bodies.
+        :param replay: serve only from the cache (see configure_cache).
+        :return:
+        """
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.replay = replay
+
+        self.meta_dir = _os.path.join(cache_dir, 'meta')
+        self.blob_dir = _os.path.join(cache_dir, 'blobs')
+
+        for path in [self.meta_dir, self.blob_dir]:
+            if not _os.path.isdir(path):
+                _os.makedirs(path)
+
+        self._lock = _threading.Lock()
+
+        # url key -> metadata, and digest -> url keys referencing it, for eviction bookkeeping
+        self._entries = {}
+        self._refs = {}
+        self._blob_sizes = {}
+        self.total_bytes = 0
+
+        for file_name in _os.listdir(self.meta_dir):
+            if file_name.endswith('.json'):
+                meta_path = _os.path.join(self.meta_dir, file_name)
+                try:
+                    with open(meta_path, 'rb') as f:
+                        entry = _json.loads(f.read())
+                except ValueError:
+                    continue
+
+                # the stored time is when the entry was written; later hits only touched the file
+                entry['accessed'] = max(entry['accessed'], _os.path.getmtime(meta_path))
+
+                if _os.path.exists(self._blob_path(entry['digest'])):
+                    self._add(file_name[:-len('.json')], entry)
+
+    def lookup(self, url):
+        key = _url_key(url)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['accessed'] = _time.time()
+
+        if entry is not None:
+            try:
+                _os.utime(_os.path.join(self.meta_dir, key + '.json'), None)
+            except OSError:
+                # evicted in the meantime
+                pass
+
+        return entry
+
+    def response(self, entry):
+        """ The cached response for entry, or None if its body has been evicted since the lookup. """
+
+        blob = self._open_blob(entry)
+        if blob is None:
+            return None
+
+        with blob:
+            body = blob.read()
+
+        return _Response(body, entry['final_url'], entry['headers'], 200)
+
+    def copy(self, entry, filename):
+        """ Copy the cached body for entry to filename, returning False if it has been evicted since the lookup. """
+
+        blob = self._open_blob(entry)
+        if blob is None:
+            return False
+
+        with blob, open(filename, 'wb') as f:
+            _shutil.copyfileobj(blob, f, 1024 * 1024)
+
+        return True
+
+    def _open_blob(self, entry):
+        """
+        Open the body file for entry. This happens under the lock, since eviction removes files under it, and an open
+        file stays readable after removal. A body that is already gone drops its URL from the cache, and gives None.
+        """
+
+        key = _url_key(entry['url'])
+
+        with self._lock:
+            try:
+                return open(self._blob_path(entry['digest']), 'rb')
+            except IOError as e:
+                if e.errno != _errno.ENOENT:
+                    raise
+
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+                    _remove_file(_os.path.join(self.meta_dir, key + '.json'))
+
+                return None
+
+    def store(self, url, body, headers, final_url):
+        digest = _hashlib.sha1(body).hexdigest()
+
+        blob_path = self._blob_path(digest)
+        if not _os.path.exists(blob_path):
+            _write_file(blob_path, lambda f: f.write(body))
+
+        self._store_entry(url, digest, len(body), headers, final_url)
+
+    def store_file(self, url, filename, headers, final_url):
+        digest = _hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), ''):
+                digest.update(block)
+        digest = digest.hexdigest()
+
+        blob_path = self._blob_path(digest)
+        if not _os.path.exists(blob_path):
+            def write(f):
+                with open(filename, 'rb') as source:
+                    _shutil.copyfileobj(source, f, 1024 * 1024)
+
+            _write_file(blob_path, write)
+
+        self._store_entry(url, digest, _os.path.getsize(filename), headers, final_url)
+
+    def _store_entry(self, url, digest, size, headers, final_url):
+        key = _url_key(url)
+        lowered = {k.lower(): v for k, v in headers.items()}
+
+        entry = {'url': url,
+                 'final_url': final_url,
+                 'digest': digest,
+                 'size': size,
+                 'headers': headers,
+                 'etag': lowered.get('etag'),
+                 'last_modified': lowered.get('last-modified'),
+                 'accessed': _time.time()}
+
+        _write_file(_os.path.join(self.meta_dir, key + '.json'), lambda f: f.write(_json.dumps(entry)))
+
+        with self._lock:
+            self._remove(key)
+            self._add(key, entry)
+
+            if self.total_bytes > self.max_bytes:
+                self._evict(key)
+
+    def _add(self, key, entry):
+        self._entries[key] = entry
+
+        digest = entry['digest']
+        if digest not in self._refs:
+            self._refs[digest] = set()
+            self._blob_sizes[digest] = entry['size']
+            self.total_bytes += entry['size']
+
+        self._refs[digest].add(key)
+
+    def _remove(self, key):
+        """ Drop a URL from the index, returning the digest of its body if no other URL references it. """
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        digest = entry['digest']
+        self._refs[digest].discard(key)
+        if not self._refs[digest]:
+            del self._refs[digest]
+            self.total_bytes -= self._blob_sizes.pop(digest)
+            return digest
+
+        return None
+
+    def _evict(self, keep_key):
+        """ Evict least recently used URLs until the cache is back under 90% of its size bound. """
+
+        target = 0.9 * self.max_bytes
+
+        for key in sorted(self._entries, key=lambda k: self._entries[k]['accessed']):
+            if self.total_bytes <= target:
+                break
+            if key == keep_key:
+                continue
+
+            digest = self._remove(key)
+
+            _remove_file(_os.path.join(self.meta_dir, key + '.json'))
+            if digest is not None:
+                _remove_file(self._blob_path(digest))
+
+    def _blob_path(self, digest):
+        return _os.path.join(self.blob_dir, digest)
+
+
+def _url_key(url):
+    return _hashlib.sha1(url).hexdigest()
+
+
+def _write_file(path, write):
+    """
+    Replace path atomically: write(f) fills a temporary file beside it, which is then renamed over it. The temporary
+    name is unique to the call, so threads storing the same URL or body never write to each other's files.
+    """
+
+    handle, temp_path = _tempfile.mkstemp(suffix='.tmp', dir=_os.path.dirname(path))
+    try:
+        with _os.fdopen(handle, 'wb') as f:
+            write(f)
+        _os.rename(temp_path, path)
+    except:
+        _remove_file(temp_path)
+        raise
+
+
+def _remove_file(path):
+    try:
+        _os.remove(path)
+    except OSError:
+        pass
+
+
+class _Response:
+    def __init__(self, body, url, headers, code):
+        """ Fully-read HTTP response, exposing the parts of the urllib2 response interface used by the scrapers. """
+
+        self._body = _StringIO(body)
+
+        self.url = url
+        self.headers = headers
+        self.code = code
+
+    def read(self, size=-1):
+        return self._body.read(size)
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+    def close(self):
+        pass
@@ -0,0 +1,291 @@
+import Queue as _Queue
+import errno as _errno
+import os as _os
+import subprocess as _subprocess
+import sys as _sys
+import tempfile as _tempfile
+import threading as _threading
+import time as _time
+from multiprocessing.connection import Client as _Client, Listener as _Listener
+
+
+DEFAULT_ADDRESS = ('localhost', 6171)
+
+# random key shared by this user's servers and clients, generated on first use (see default_authkey)
+KEY_PATH = _os.path.join(_os.path.expanduser('~'), '.legislative_data_ner_key')
+
+# environment variable through which ensure_server hands a caller's key to the service process
+_AUTHKEY_ENV = 'LEGISLATIVE_DATA_NER_AUTHKEY'
+
+
+def default_authkey(path=KEY_PATH):
+    """
+    Key used by servers and clients when none is given: 32 random bytes, generated on first use and kept in a file
+    that only the current user can read, so only their processes can connect to the service.
+    """
+
+    if not _os.path.exists(path):
+        handle, temp_path = _tempfile.mkstemp(dir=_os.path.dirname(path))
+        try:
+            with _os.fdopen(handle, 'wb') as f:
+                f.write(_os.urandom(32))
+
+            # linking never replaces a key another process created in the meantime
+            try:
+                _os.link(temp_path, path)
+            except OSError as e:
+                if e.errno != _errno.EEXIST:
+                    raise
+        finally:
+            _os.remove(temp_path)
+
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class NERServer:
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, batch_size=64, max_queued=1024):
+        """
+        Resident tagging service. The LSTM entity tagger is loaded once, and tagging requests from any number of
+        extractors (in this or other processes) are served over a local socket. Each client connection is handled by
+        its own thread, which puts requests on a shared queue; a single model thread drains the queue, merging
+        whatever requests are waiting into one batch, so concurrent clients share full batches on the model.
+
+        :param address: (host, port) or socket path to listen on.
+        :param authkey: shared key required from clients; default_authkey() if not given.
+        :param batch_size: number of sentences passed to the model per call.
+        :param max_queued: bound on waiting requests; connection threads block once it is reached.
+        :return:
+        """
+
+        self.address = address
+        self.authkey = authkey if authkey is not None else default_authkey()
+        self.batch_size = batch_size
+
+        self.requests = _Queue.Queue(max_queued)
+        self.model = None
+        self.started = None
+        self.n_served = 0
+
+        self._listener = None
+        self._stopping = _threading.Event()
+
+    def serve_forever(self, model=None):
+        """ Load the model (unless one is given), then accept connections until a client asks for shutdown. """
+
+        from _country_entities import load_lstm_model
+
+        self.model = model if model is not None else load_lstm_model()
+        self.started = _time.time()
+
+        self._listener = _Listener(self.address, authkey=self.authkey)
+
+        model_thread = _threading.Thread(target=self._run_model)
+        model_thread.daemon = True
+        model_thread.start()
+
+        print('NER service listening on {0}'.format(self._listener.address))
+
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._stopping.is_set():
+                    break
+                continue
+
+            if self._stopping.is_set():
+                # the connection stop() made to wake this loop
+                conn.close()
+                break
+
+            conn_thread = _threading.Thread(target=self._handle, args=(conn,))
+            conn_thread.daemon = True
+            conn_thread.start()
+
+        self._listener.close()
+
+        self.requests.put(None)
+        model_thread.join()
+
+    def _handle(self, conn):
+        """ Read requests from one client connection and pass them to the model thread. """
+
+        try:
+            while True:
+                try:
+                    command, payload = conn.recv()
+                except (EOFError, IOError):
+                    break
+
+                if command == 'tag':
+                    reply = _Reply()
+                    self.requests.put((payload, reply))
+                    conn.send(reply.wait())
+
+                elif command == 'ping':
+                    conn.send(('ok', {'uptime': _time.time() - self.started,
+                                      'queued': self.requests.qsize(),
+                                      'served': self.n_served}))
+
+                elif command == 'shutdown':
+                    conn.send(('ok', None))
+                    self.stop()
+                    break
+
+                else:
+                    conn.send(('error', 'Unknown command: {0}'.format(command)))
+        finally:
+            conn.close()
+
+    def _run_model(self):
+        from _country_entities import tag_with_model
+
+        while True:
+            pending = [self.requests.get()]
+
+            # merge every request already waiting into the same batch
+            while True:
+                try:
+                    pending.append(self.requests.get_nowait())
+                except _Queue.Empty:
+                    break
+
+            stop = None in pending
+            pending = [request for request in pending if request is not None]
+
+            if pending:
+                sentences = [sent for payload, _ in pending for sent in payload]
+
+                try:
+                    tags = tag_with_model(self.model, sentences, self.batch_size)
+                except Exception as e:
+                    for _, reply in pending:
+                        reply.set(('error', repr(e)))
+                else:
+                    start = 0
+                    for payload, reply in pending:
+                        reply.set(('ok', tags[start:start + len(payload)]))
+                        start += len(payload)
+
+                    self.n_served += len(sentences)
+
+            if stop:
+                break
+
+    def stop(self):
+        self._stopping.set()
+
+        # wake the accept loop so that it sees the stop flag; it closes its end of this connection
+        try:
+            conn = _Client(self._listener.address, authkey=self.authkey)
+        except Exception:
+            return
+
+        conn.close()
+
+
+class NERClient:
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None):
+        """ Connection to a running NERServer, usable wherever an extractor expects its model. """
+
+        self.address = address
+        self.authkey = authkey if authkey is not None else default_authkey()
+        self._conn = _Client(address, authkey=self.authkey)
+        self._lock = _threading.Lock()
+
+    def tag_sentences(self, sentences):
+        """ Tag a list of tokenized sentences, returning one list of tags per sentence. """
+
+        return self._call('tag', [list(sent) for sent in sentences])
+
+    def predict(self, sent):
+        return self.tag_sentences([sent])[0]
+
+    def ping(self):
+        """ Health check; returns the server's uptime, queue length and number of sentences served. """
+
+        return self._call('ping')
+
+    def shutdown(self):
+        self._call('shutdown')
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _call(self, command, payload=None):
+        with self._lock:
+            self._conn.send((command, payload))
+            status, result = self._conn.recv()
+
+        if status != 'ok':
+            raise RuntimeError('NER service error: {0}'.format(result))
+
+        return result
+
+
+class _Reply:
+    def __init__(self):
+        self._event = _threading.Event()
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+        self._event.set()
+
+    def wait(self):
+        self._event.wait()
+        return self.value
+
+
+def ensure_server(address=DEFAULT_ADDRESS, authkey=None, timeout=600):
+    """
+    Return the address of a healthy NER service, starting one in a background process if none is answering. Waits up
+    to timeout seconds for the model to load. A key given here reaches the service through its environment rather
+    than its command line, where other users could see it.
+    """
+
+    if authkey is None:
+        authkey = default_authkey()
+
+    try:
+        _ping(address, authkey)
+        return address
+    except Exception:
+        pass
+
+    host, port = address
+    _subprocess.Popen([_sys.executable, __file__, host, str(port)],
+                      env=dict(_os.environ, **{_AUTHKEY_ENV: authkey.encode('hex')}))
+
+    deadline = _time.time() + timeout
+    while True:
+        try:
+            _ping(address, authkey)
+            return address
+        except Exception:
+            if _time.time() > deadline:
+                raise RuntimeError('NER service did not start within {0} seconds'.format(timeout))
+            _time.sleep(1)
+
+
+def _ping(address, authkey):
+    client = NERClient(address, authkey)
+    try:
+        return client.ping()
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    if len(_sys.argv) > 2:
+        server_address = (_sys.argv[1], int(_sys.argv[2]))
+    else:
+        server_address = DEFAULT_ADDRESS
+
+    server_authkey = _os.environ[_AUTHKEY_ENV].decode('hex') if _AUTHKEY_ENV in _os.environ else None
+
+    NERServer(server_address, server_authkey).serve_forever()
@@ -0,0 +1,211 @@
+import hashlib as _hashlib
+import mmap as _mmap
+import os as _os
+import struct as _struct
+
+
+class TokenCache:
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        """
+        Persistent cache of tokenized text, keyed by the SHA-1 of each chunk (and the tokenizer used). Each entry is
+        stored as a compact binary record: the number of sentences, the token count of each sentence and the byte
+        length of each token as uint32 arrays, then the UTF-8 token bytes. Records are appended to a data file that is
+        read through mmap, and an append-only index maps each key to its record.
+
+        Size is bounded with two generations: once the current generation passes half of max_bytes, the previous one
+        is deleted and a new one started. Entries found in the previous generation are copied into the current one,
+        so chunks still in use survive the rollover.
+
+        Only one process should write to a cache directory at a time.
+
+        :param cache_dir: directory holding the cache; created if necessary.
+        :param max_bytes: approximate bound on total cache size.
+        :return:
+        """
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        if not _os.path.isdir(cache_dir):
+            _os.makedirs(cache_dir)
+
+        generations = sorted(int(f[len('tokens-'):-len('.dat')]) for f in _os.listdir(cache_dir)
+                             if f.startswith('tokens-') and f.endswith('.dat'))
+
+        # drop anything older than the last two generations, e.g. after a crash mid-rollover
+        for generation in generations[:-2]:
+            _Generation(cache_dir, generation).remove()
+
+        generations = generations[-2:] or [0]
+
+        self.current = _Generation(cache_dir, generations[-1])
+        self.previous = _Generation(cache_dir, generations[0]) if len(generations) > 1 else None
+
+    def tokenize(self, text, tokenizer, kind='nltk'):
+        """
+        Return the tokenized sentences of text, calling tokenizer(text) only if they are not already cached.
+
+        :param text: chunk of text.
+        :param tokenizer: function returning a list of sentences, each a list of token strings.
+        :param kind: name of the tokenizer, kept in the key so that differently tokenized copies do not collide.
+        """
+
+        key = _key(text, kind)
+
+        sentences = self.get(key)
+        if sentences is None:
+            sentences = tokenizer(text)
+            self.put(key, sentences)
+
+        return sentences
+
+    def get(self, key):
+        sentences = self.current.get(key)
+
+        if sentences is None and self.previous is not None:
+            sentences = self.previous.get(key)
+
+            if sentences is not None:
+                self.put(key, sentences)
+
+        return sentences
+
+    def put(self, key, sentences):
+        self.current.put(key, _encode(sentences))
+
+        if self.current.size() > self.max_bytes // 2:
+            self._rollover()
+
+    def close(self):
+        for generation in [self.current, self.previous]:
+            if generation is not None:
+                generation.close()
+
+    def _rollover(self):
+        if self.previous is not None:
+            self.previous.remove()
+
+        self.current.close()
+
+        self.previous = self.current
+        self.current = _Generation(self.cache_dir, self.previous.generation + 1)
+
+
+class _Generation:
+    def __init__(self, cache_dir, generation):
+        self.generation = generation
+        self.data_path = _os.path.join(cache_dir, 'tokens-{0:05d}.dat'.format(generation))
+        self.index_path = _os.path.join(cache_dir, 'index-{0:05d}.log'.format(generation))
+
+        # key -> (offset, length)
+        self.index = {}
+
+        if _os.path.exists(self.index_path):
+            data_size = _os.path.getsize(self.data_path) if _os.path.exists(self.data_path) else 0
+
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    fields = line.decode('utf8').rstrip('\n').split('\t')
+
+                    # a crash mid-append can leave a partial last line, which is simply dropped
+                    if len(fields) == 3 and fields[2].isdigit() and int(fields[1]) + int(fields[2]) <= data_size:
+                        self.index[fields[0]] = (int(fields[1]), int(fields[2]))
+
+        self._writer = None
+        self._index_writer = None
+        self._map = None
+
+    def get(self, key):
+        location = self.index.get(key)
+        if location is None:
+            return None
+
+        offset, length = location
+
+        if self._map is None or offset + length > len(self._map):
+            self._remap()
+
+        return _decode(self._map, offset)
+
+    def put(self, key, record):
+        if self._writer is None:
+            self._writer = open(self.data_path, 'ab')
+            self._index_writer = open(self.index_path, 'ab')
+
+        offset = self._writer.tell()
+        self._writer.write(record)
+        self._writer.flush()
+
+        # the index entry is only written once the record itself is on disk
+        self._index_writer.write('{0}\t{1}\t{2}\n'.format(key, offset, len(record)).encode('utf8'))
+        self._index_writer.flush()
+
+        self.index[key] = (offset, len(record))
+
+    def size(self):
+        return _os.path.getsize(self.data_path) if _os.path.exists(self.data_path) else 0
+
+    def close(self):
+        for handle in [self._writer, self._index_writer, self._map]:
+            if handle is not None:
+                handle.close()
+
+        self._writer = None
+        self._index_writer = None
+        self._map = None
+
+    def remove(self):
+        self.close()
+
+        for path in [self.data_path, self.index_path]:
+            if _os.path.exists(path):
+                _os.remove(path)
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+
+        with open(self.data_path, 'rb') as f:
+            self._map = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+
+
+def _key(text, kind):
+    return _hashlib.sha1(_utf8(kind) + b'\0' + _utf8(text)).hexdigest()
+
+
+def _encode(sentences):
+    tokens = [_utf8(token) for sent in sentences for token in sent]
+
+    header = [len(sentences)] + [len(sent) for sent in sentences] + [len(token) for token in tokens]
+
+    return _struct.pack('<{0}I'.format(len(header)), *header) + b''.join(tokens)
+
+
+def _decode(buf, offset):
+    n_sentences = _struct.unpack_from('<I', buf, offset)[0]
+    offset += 4
+
+    sentence_lengths = _struct.unpack_from('<{0}I'.format(n_sentences), buf, offset)
+    offset += 4 * n_sentences
+
+    n_tokens = sum(sentence_lengths)
+    token_lengths = _struct.unpack_from('<{0}I'.format(n_tokens), buf, offset)
+    offset += 4 * n_tokens
+
+    tokens = []
+    for length in token_lengths:
+        tokens.append(buf[offset:offset + length].decode('utf8'))
+        offset += length
+
+    sentences = []
+    start = 0
+    for length in sentence_lengths:
+        sentences.append(tokens[start:start + length])
+        start += length
+
+    return sentences
+
+
+def _utf8(text):
+    # written to run under both the Python 2 pipeline and Python 3 notebooks
+    return text if isinstance(text, bytes) else text.encode('utf8')
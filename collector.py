@@ -6,15 +6,21 @@ import os
 import re
 from datetime import datetime
 
+import _http
+from _download_log import LogJournal
+
 
 class DataManager:
-    def __init__(self, wrk_dir):
+    def __init__(self, wrk_dir, cache_size=0, replay=False):
         """
         Overall manager class, to handle scraped data. Upon initialization, creates the file structure to hold the
         output at the given working directory and builds a log file to record which files have been downloaded. Indexing
         within the log is country-specific, to reflect the numbering systems used by each country-level database.
 
         :param wrk_dir: directory at which to create the file structure.
+        :param cache_size: size bound (in bytes) for the on-disk cache of scraper HTTP responses. The default of 0
+                           disables the cache; something like 20 * 1024 ** 3 keeps up to 20 GB.
+        :param replay: if True, scrapers are served only from the response cache and never touch the network.
         :return:
         """
 
@@ -29,19 +35,27 @@ class DataManager:
                 os.mkdir(self.data_path)
                 os.mkdir(os.path.join(self.data_path, 'Legislation'))
 
-            if not os.path.exists(self.log_path):
-                log_data = {'last updated': None}
+            # completed IDs are journaled as they come in, and periodically compacted into log.json
+            self.journal = LogJournal(self.log_path)
+            log_data = self.journal.load()
 
-                with open(self.log_path, 'wb') as f:
-                    f.write(json.dumps(log_data))
+            if not os.path.exists(self.log_path) or self.journal.pending:
+                self.journal.compact(log_data)
 
+            if cache_size or replay:
+                _http.configure_cache(os.path.join(self.data_path, 'Cache'), cache_size, replay)
             else:
-                with open(self.log_path, 'rb') as f:
-                    log_data = json.loads(f.read())
+                _http.configure_cache(None)
+
+        # corpus stores for countries whose annual legislation has been migrated, opened on first use
+        self._stores = {}
+
+        # one keep-alive client for every scraper, so connections to each host are reused across countries and updates
+        self.client = _http.HttpClient()
 
         self.log_data = log_data
 
-    def update_annual(self):
+    def update_annual(self, workers=1, host_limit=2, rate_limit=2.):
         """
         Wrapper function to run the various scrapers contained in the package and write the outputs. Also sets up file
         structure for output within each country. Initializes each scraper, and updates on-disk dataset based on the
@@ -50,10 +64,17 @@ class DataManager:
         Each scraper should have a scraper.data attribute which consists of a list of dictionaries, each of
         which holds metadata and text for each piece of legislation. Each entry should, at minimum, have a unique 'id'
         key, which is used to generate the file path for the output.
+
+        :param workers: number of pieces of legislation (and search result pages) to download concurrently.
+        :param host_limit: maximum number of concurrent requests to any one host.
+        :param rate_limit: maximum sustained requests per second to any one host (None for no limit).
         """
 
         import _country_scrapers_annual
 
+        _http.set_host_limit(host_limit)
+        _http.set_rate_limit(rate_limit)
+
         self.log_data['last updated'] = datetime.now().strftime('%m/%d/%Y')
 
         countries = [c for c in dir(_country_scrapers_annual) if '_' not in c]
@@ -65,20 +86,21 @@ class DataManager:
             self._initialize_folders(country)
 
             # Initialize the scraper for annual legislation for a given country, and write the output
-            scraper = getattr(_country_scrapers_annual, country)(self.log_data, country)
-            for entry in scraper.iter_data():
-                out_path = os.path.join(self.data_path, 'Legislation',
-                                        country.strip('_'), 'Annual',
-                                        entry['id']) + '.json'
-
-                with open(out_path, 'wb') as f:
-                    f.write(json.dumps(entry))
+            scraper = getattr(_country_scrapers_annual, country)(self.log_data, country, workers, self.client)
+            for entry in scraper.iter_data(workers):
+                self._write_annual(country.strip('_'), entry['id'], entry)
 
                 self.log_data = scraper.log_data
 
-                # write the updated log
-                with open(self.log_path, 'wb') as f:
-                    f.write(json.dumps(self.log_data))
+                # the scraper marks each ID complete once the next entry is requested, so compacting here (before
+                # journaling the current ID) snapshots exactly the IDs already in the journal
+                if self.journal.due():
+                    self.journal.compact(self.log_data)
+
+                self.journal.record('Annual', country, entry['id'])
+
+            self.log_data = scraper.log_data
+            self.journal.compact(self.log_data)
 
     def update_consolidated(self):
         """
@@ -96,16 +118,29 @@ class DataManager:
 
             self._initialize_folders(country)
             print(self.log_data.keys())
-            scraper = getattr(_country_scrapers_consolidated, country)(self.log_data, country, self.data_path)
+            scraper = getattr(_country_scrapers_consolidated, country)(self.log_data, country, self.data_path,
+                                                                    self.client)
             scraper.update_code()
 
             self.log_data = scraper.log_data
 
             # write the updated log
-            with open(self.log_path, 'wb') as f:
-                f.write(json.dumps(self.log_data))
+            self.journal.compact(self.log_data)
 
-    def append_parsed(self):
+    def append_parsed(self, processes=1, chunksize=8, force=False):
+        """
+        Parse every scraped document with the country-level parsers in _country_parsers_annual, and add the output to
+        each document under 'parsed'. Documents that fail to parse are reported and left unchanged, rather than
+        aborting the run.
+
+        Each parsed document records a fingerprint of its source text and of the parser version used. Documents
+        whose fingerprint is still current are skipped, so only new or stale documents are re-parsed.
+
+        :param processes: number of worker processes to spread documents across.
+        :param chunksize: number of documents handed to a worker at a time.
+        :param force: re-parse every document, regardless of fingerprint.
+        """
+        import itertools
         import _country_parsers_annual
 
         _country_scrapers_annual = reload(_country_parsers_annual)
@@ -114,20 +149,58 @@ class DataManager:
 
         base_dir = os.path.join(self.data_path, 'Legislation', '{0}', 'Annual')
 
-        for country in countries:
-            country_dir = base_dir.format(country)
-            file_list = os.listdir(country_dir)
+        pool = None
+        if processes > 1:
+            import multiprocessing
+            pool = multiprocessing.Pool(processes)
 
-            for file_name in file_list:
-                full_path = os.path.join(country_dir, file_name)
-                with open(full_path, 'rb') as f:
-                    content = json.loads(f.read())
+        try:
+            for country in countries:
+                country_dir = base_dir.format(country)
+                country_parser = getattr(_country_parsers_annual, country)
+
+                work = ((country, os.path.join(country_dir, key + '.json'), key, content)
+                        for key, content in self._iter_annual(country)
+                        if force or not country_parser.is_current(content))
 
-                manager = getattr(_country_parsers_annual, country)(full_path, content)
-                manager.parse()
+                # documents are handed out in bounded batches, so the corpus is never held in memory at once and all
+                # reads and writes stay in this process
+                batch_size = processes * chunksize * 4
 
-                with open(full_path, 'wb') as f:
-                    f.write(json.dumps(manager.content))
+                n_done = 0
+                failures = []
+
+                while True:
+                    batch = list(itertools.islice(work, batch_size))
+                    if not batch:
+                        break
+
+                    if pool is None:
+                        results = itertools.imap(_parse_document, batch)
+                    else:
+                        results = pool.imap_unordered(_parse_document, batch, chunksize)
+
+                    for key, content, error in results:
+                        n_done += 1
+
+                        if error is None:
+                            self._write_annual(country, key, content)
+                        else:
+                            failures.append(key)
+                            print('Failed to parse {0}:\n{1}'.format(key, error))
+
+                    print('{0}: {1} documents parsed, {2} failed'.format(country, n_done, len(failures)))
+
+                if failures:
+                    print('{0}: failed documents: {1}'.format(country, ', '.join(failures)))
+
+                if n_done > len(failures):
+                    self._compact_annual(country)
+
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
     def append_auxiliary(self):
         import _country_auxiliary_annual
@@ -137,172 +210,356 @@ class DataManager:
         aux_dir = os.path.join(self.data_path, 'Auxiliary')
 
         for country in countries:
-            country_path = base_dir.format(country)
-            file_list = [os.path.join(country_path, f) for f in os.listdir(country_path) if 'resolution' not in f]
+            store = self._annual_store(country)
+
+            if store is None:
+                country_path = base_dir.format(country)
+                file_list = [os.path.join(country_path, f) for f in os.listdir(country_path) if 'resolution' not in f]
+
+                appender = getattr(_country_auxiliary_annual, country)(file_list, aux_dir, country)
+                appender.add_auxiliary()
+
+            else:
+                appender = getattr(_country_auxiliary_annual, country)([], aux_dir, country)
+                auxiliary = appender._retrieve_auxiliary()
+
+                keys = [k for k in store.keys() if 'resolution' not in k]
+                for key, content in store.iter_records(keys):
+                    appender.augment(content, auxiliary)
+                    store.put(key, content)
 
-            appender = getattr(_country_auxiliary_annual, country)(file_list, aux_dir, country)
-            appender.add_auxiliary()
+                self._compact_annual(country)
 
-    def extract_entities_annual(self, write=True):
+    def extract_entities_annual(self, write=True, flush_every=100, batch_size=1, edge_backend='python',
+                                ner_service=None, tagger='lstm', cache_tokens=True, processes=1, resume=False):
+        """
+        Run entity extraction over the parsed annual legislation, and stream one row of network statistics and
+        metadata per document to Out/out_annual.csv. Only the output columns of each document are kept, so memory use
+        does not grow with the size of the corpus.
+
+        Rows are written in the same order whether or not the work is spread across processes. Each time the output is
+        flushed, the IDs written so far are recorded in a checkpoint file next to it, so an interrupted run can be
+        picked up with resume=True without redoing finished bills.
+
+        :param write: write the output CSV.
+        :param flush_every: number of rows to buffer between flushes to disk.
+        :param batch_size: number of documents to hand to the entity extractor at once.
+        :param edge_backend: co-mention edge backend for the extractor ('python' or 'numpy').
+        :param ner_service: address of a shared NER service (see _ner_service), or True for the default address; the
+                            tagger is loaded in this process if not given.
+        :param tagger: entity tagger ('lstm' or 'gazetteer').
+        :param cache_tokens: memoize chunk tokenization on disk (see _token_cache). Only used with a single process,
+                             since the cache takes one writer at a time.
+        :param processes: number of worker processes. Each worker builds its own extractor (and so loads the tagger)
+                          once, and is handed batches of batch_size documents.
+        :param resume: append to the output of an interrupted run, skipping the IDs in its checkpoint.
+        """
+        import itertools
         import _country_entities
 
         # change here as necessary to implement more countries later
         countries = ['UnitedStatesAnnual']
 
-        base_dir = os.path.join(self.data_path, 'Legislation', '{0}', 'Annual')
         out_path = os.path.join(self.data_path, 'Out', 'out_annual.csv')
+        fieldnames = ['id', 'date', 'title', 'clustering', 'total_nodes', 'total_edges', 'average_degree', 'topic',
+                      'sponsor', 'dw', 'sponsor_party', 'sponsor_majority', 'cosponsors', 'hearings', 'referred',
+                      'control', 'president_party', 'commemorative']
 
-        out = []
+        writer = None
+        done = set()
+        if write:
+            writer = ResultsWriter(out_path, fieldnames, flush_every=flush_every, append=resume,
+                                   checkpoint_path=out_path + '.checkpoint')
+            done = writer.done
 
-        for country in countries:
-            parser = getattr(_country_entities, country)()
+        token_cache = self._token_cache() if cache_tokens and processes <= 1 else None
 
-            country_dir = base_dir.format(re.sub('Annual', '', country))
-            file_list = [os.path.join(country_dir, f) for f in os.listdir(country_dir) if 'resolution' not in f]
+        pool = None
 
-            for file_name in file_list:
-                print(re.sub('_', '/', file_name).strip('.json'))
+        try:
+            for country in countries:
+                extractor_args = {'edge_backend': edge_backend, 'ner_service': ner_service, 'tagger': tagger}
+
+                if processes > 1:
+                    import multiprocessing
+                    pool = multiprocessing.Pool(processes, _init_entity_worker, (country, extractor_args))
+                else:
+                    _init_entity_worker(country, dict(extractor_args, token_cache=token_cache))
+
+                country_name = re.sub('Annual', '', country)
+                keys = [k for k in self._annual_keys(country_name) if 'resolution' not in k and k not in done]
+
+                def batches():
+                    batch = []
+                    for key, content in self._iter_annual(country_name, keys):
+                        print(re.sub('_', '/', key))
+
+                        if content['parsed']:
+                            # only the output columns and parsed text are held while a batch fills up
+                            batch.append((key, {k: content.get(k) for k in fieldnames}, content['parsed']))
+
+                            if len(batch) >= batch_size:
+                                yield batch
+                                batch = []
+
+                    if batch:
+                        yield batch
+
+                work = batches()
+
+                while True:
+                    # batches are handed out in bounded waves, so the corpus is never queued in memory at once
+                    wave = list(itertools.islice(work, max(processes, 1) * 4))
+                    if not wave:
+                        break
+
+                    if pool is None:
+                        results = itertools.imap(_extract_entities, wave)
+                    else:
+                        results = pool.imap(_extract_entities, wave)
+
+                    for rows in results:
+                        for key, row in rows:
+                            if writer is not None:
+                                writer.writerow(row, key)
+
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+                    pool = None
+        finally:
+            if pool is not None:
+                pool.terminate()
+            if writer is not None:
+                writer.close()
+            if token_cache is not None:
+                token_cache.close()
+
+    def extract_entities_consolidated(self, write=True, ner_service=None, tagger='lstm', cache_tokens=True,
+                                      batch_size=16, edge_backend='python'):
+        """
+        Run entity extraction over each chapter-year of the consolidated code, streaming one row of network statistics
+        per chapter-year to Out/out_consolidated.csv and writing its graph to Out/consolidated_graphs. Results are kept
+        in a store keyed by a hash of each chapter's parsed text (Cache/Entities), so unchanged chapters - in later
+        editions, other titles or later runs - are looked up instead of extracted again. Chapters that did change are
+        updated section by section from their previous edition: only new or changed sections are tagged (their entities
+        are kept in a second store), and the co-mention counts are adjusted for the sections added and removed.
+
+        :param write: write the output CSV.
+        :param ner_service: address of a shared NER service (see _ner_service), or True for the default address.
+        :param tagger: entity tagger ('lstm' or 'gazetteer').
+        :param cache_tokens: memoize chunk tokenization on disk (see _token_cache).
+        :param batch_size: number of new chapters to hand to the entity extractor at once.
+        :param edge_backend: co-mention edge backend for the extractor ('python' or 'numpy').
+        """
+        from _entity_store import ResultStore, SectionStore
+        import _country_entities
 
-                with open(file_name, 'rb') as in_f:
-                    content = json.loads(in_f.read())
+        # change here as necessary to implement more countries later
+        countries = ['UnitedStatesConsolidated']
 
-                    if content['parsed']:
-                        parsed = parser.do_entity_extraction(content['parsed'])
+        base_dir = os.path.join(self.data_path, 'Legislation', '{0}', 'Consolidated')
+        out_dir = os.path.join(self.data_path, 'Out')
 
-                        keys_to_add = ['total_nodes', 'total_edges', 'clustering', 'average_degree']
-                        null_keys = ['cosponsors', 'hearings', 'referred']
+        out_path = os.path.join(out_dir, 'out_consolidated.csv')
 
-                        content.update({k: parsed[k] for k in keys_to_add})
-                        content.update({k: len(content[k]) if content[k] else 0 for k in null_keys})
+        fieldnames = ['id', 'date', 'title', 'clustering', 'total_nodes', 'total_edges', 'average_degree']
 
-                        out.append(content)
+        writer = ResultsWriter(out_path, fieldnames, writer_class=DictUnicodeWriter) if write else None
+        token_cache = self._token_cache() if cache_tokens else None
 
-                        # writing as output is generated for safety
-                        if write:
-                            with open(out_path, 'a') as out_f:
-                                writer = csv.DictWriter(out_f,
-                                                        fieldnames=['id', 'date', 'title', 'clustering', 'total_nodes',
-                                                                    'total_edges', 'average_degree', 'topic', 'sponsor',
-                                                                    'dw',
-                                                                    'sponsor_party', 'sponsor_majority', 'cosponsors',
-                                                                    'hearings', 'referred', 'control',
-                                                                    'president_party', 'commemorative'],
-                                                        extrasaction='ignore')
+        try:
+            for country in countries:
+                entity_parser = getattr(_country_entities, country)(edge_backend=edge_backend, ner_service=ner_service,
+                                                                    tagger=tagger, token_cache=token_cache)
 
-                                if len(out) == 1:
-                                    writer.writeheader()
+                store_path = os.path.join(self.data_path, 'Cache', 'Entities', country + '-' + tagger)
+                results = ResultStore(store_path)
+                sections = SectionStore(store_path + '-sections')
 
-                                writer.writerow(out[-1])
+                country = re.sub('Consolidated', '', country)
+                country_dir = base_dir.format(country)
 
-        # overwriting the whole thing at the end - probably not necessary
-        if write:
-            with open(out_path, 'wb') as f:
-                writer = csv.DictWriter(f, fieldnames=['id', 'date', 'title', 'clustering', 'total_nodes',
-                                                       'total_edges', 'average_degree', 'topic', 'sponsor', 'dw',
-                                                       'sponsor_party', 'sponsor_majority', 'cosponsors',
-                                                       'hearings', 'referred', 'control',
-                                                       'president_party', 'commemorative'],
-                                        extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(out)
-
-    def extract_entities_consolidated(self, write=True):
-        from networkx.readwrite import json_graph
-        import _country_entities
+                for title in sorted(os.listdir(country_dir)):
+                    print('Title: ' + title)
 
-        # change here as necessary to implement more countries later
-        countries = ['UnitedStatesConsolidated']
+                    title_dir = os.path.join(country_dir, title)
 
-        # update if more years are added
-        years = [str(yr) for yr in range(1994, 2018)]
+                    # (row, content key) per chapter-year, the chapters not yet in the store, and the co-mention
+                    # counts of the latest edition of each chapter extracted so far
+                    rows = []
+                    new_chapters = []
+                    states = {}
 
-        base_dir = os.path.join(self.data_path, 'Legislation', '{0}', 'Consolidated')
-        out_dir = os.path.join(self.data_path, 'Out')
+                    for chapter_file in sorted(os.listdir(title_dir)):
+                        print(chapter_file)
 
-        out_path = os.path.join(out_dir, 'out_consolidated.csv')
+                        with open(os.path.join(title_dir, chapter_file), 'rb') as f:
+                            current_chapter = json.loads(f.read())
 
-        fieldnames = ['id', 'date', 'title', 'clustering', 'total_nodes', 'total_edges', 'average_degree']
+                        if current_chapter['parsed']:
+                            chapter_id = re.search('(.*?)_([0-9]{4})', chapter_file).group(1)
 
-        out = []
+                            key = results.content_key(current_chapter['parsed'])
+                            if key not in results and key not in [k for k, _, _ in new_chapters]:
+                                new_chapters.append((key, chapter_id, current_chapter['parsed']))
 
-        for country in countries:
-            entity_parser = getattr(_country_entities, country)()
+                            row = {k: current_chapter.get(k, u'') for k in ['id', 'date', 'title']}
+                            row['graph_name'] = re.sub('\.json$', '', chapter_file)
 
-            country = re.sub('Consolidated', '', country)
-            country_dir = base_dir.format(country)
-            title_list = os.listdir(country_dir)
+                            rows.append((row, key))
 
-            for title in title_list:
-                print('Title: ' + title)
+                        if len(new_chapters) >= batch_size:
+                            self._extract_new(entity_parser, results, sections, states, new_chapters)
+                            new_chapters = []
 
-                title_dir = os.path.join(country_dir, title)
-                chapter_list = os.listdir(title_dir)
+                    if new_chapters:
+                        self._extract_new(entity_parser, results, sections, states, new_chapters)
 
-                previous_chapter_id = None
-                entities_data = {}
+                    graph_dir = os.path.join(out_dir, 'consolidated_graphs', title)
+                    if rows and not os.path.isdir(graph_dir):
+                        os.makedirs(graph_dir)
 
-                for chapter_file in sorted(chapter_list):
-                    print(chapter_file)
-                    chapter_id, year = re.search('(.*?)_([0-9]{4})', chapter_file).groups()
+                    for row, key in rows:
+                        result = results.get(key)
 
-                    chapter_path = os.path.join(title_dir, chapter_file)
-                    with open(chapter_path, 'rb') as f:
-                        current_chapter = json.loads(f.read())
+                        with open(os.path.join(graph_dir, row.pop('graph_name') + '.json'), 'w') as f:
+                            if result['graph']:
+                                f.write(json.dumps(result['graph']))
+                            else:
+                                f.write('')
 
-                    if current_chapter['parsed']:
-                        if chapter_id != previous_chapter_id:
-                            previous_chapter_id = chapter_id
-                            entities_data = entity_parser.do_entity_extraction(current_chapter['parsed'])
-                        else:
-                            previous_chapter_paths = [os.path.join(title_dir, '_'.join([chapter_id, str(yr)])) + '.json'
-                                                      for yr in list(reversed(range(1994, int(year))))]
+                        row.update({k: unicode(result[k]) for k in fieldnames if k not in row})
 
-                            entitites_data = {}
+                        if writer is not None:
+                            writer.writerow(row)
 
-                            for previous_chapter_path in previous_chapter_paths:
-                                if os.path.isfile(previous_chapter_path):
-                                    with open(previous_chapter_path, 'rb') as f:
-                                        previous_chapter = json.loads(f.read())
+                results.close()
+                sections.close()
+        finally:
+            if writer is not None:
+                writer.close()
+            if token_cache is not None:
+                token_cache.close()
 
-                                    # implicitly leaves entity data the same as the previous step if text unchanged
-                                    if previous_chapter['parsed'] == current_chapter['parsed']:
-                                        current_chapter.update({k: out[-1][k] for k in fieldnames
-                                                                if k not in current_chapter})
-                                        break
+    @staticmethod
+    def _extract_new(entity_parser, results, sections, states, new_chapters):
+        """
+        Extract entities for a batch of (content key, chapter ID, parsed text) chapter-years, in edition order, and add
+        them to the result store.
+        """
 
-                            if not all([fieldname in current_chapter for fieldname in fieldnames]):
-                                entities_data = entity_parser.do_entity_extraction(current_chapter['parsed'])
+        extracted = entity_parser.do_entity_extraction_incremental([(chapter_id, parsed)
+                                                                    for _, chapter_id, parsed in new_chapters],
+                                                                   sections, states)
 
-                        current_chapter.update({k: str(entities_data[k]) for k in fieldnames
-                                                if k not in current_chapter})
-                        out.append({k: current_chapter[k] for k in current_chapter if k in fieldnames})
+        for (key, _, _), result in zip(new_chapters, extracted):
+            results.put(key, result)
 
-                        graph_dir = os.path.join(out_dir, 'consolidated_graphs', title)
-                        if not os.path.isdir(graph_dir):
-                            os.makedirs(graph_dir)
+    def migrate_corpus(self, remove=False):
+        """
+        Move each country's annual legislation from one JSON file per bill into a compressed corpus store
+        (Legislation/<Country>/Annual.store). Once a country has a store, all DataManager functions read and write
+        through it instead of the JSON files.
 
-                        with open(os.path.join(graph_dir, chapter_id + '_' + year + '.json'), 'w') as f:
-                            if entities_data['graph']:
-                                f.write(json.dumps(json_graph.adjacency_data(entities_data['graph'])))
-                            else:
-                                f.write('')
+        :param remove: delete the JSON files once they have been copied into the store.
+        """
+        from _corpus_store import migrate_directory
 
-                        # writing as output is generated for safety
-                        if write:
-                            with open(out_path, 'a') as f:
-                                writer = DictUnicodeWriter(f, fieldnames=fieldnames)
-                                if os.path.getsize(out_path) == 0:
-                                    writer.writeheader()
+        legislation_dir = os.path.join(self.data_path, 'Legislation')
 
-                                writer.writerow(out[-1])
+        for country in sorted(os.listdir(legislation_dir)):
+            annual_dir = os.path.join(legislation_dir, country, 'Annual')
 
-        # overwriting the whole thing at the end - probably not necessary
-        if write:
-            with open(out_path, 'wb') as f:
-                writer = DictUnicodeWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(out)
+            if os.path.isdir(annual_dir):
+                store = self._annual_store(country, create=True)
+                n_migrated = migrate_directory(annual_dir, store, remove)
+                store.close()
 
+                print('{0}: migrated {1} documents'.format(country, n_migrated))
+
+    def compact_corpus(self):
+        """
+        Rewrite each country's corpus store without its superseded document versions. Updates only compact a store
+        once enough of it is superseded; this reclaims the space regardless.
+        """
+
+        legislation_dir = os.path.join(self.data_path, 'Legislation')
+
+        for country in sorted(os.listdir(legislation_dir)):
+            self._compact_annual(country, min_dead_fraction=0.)
+
+    def _token_cache(self):
+        """ Tokenization cache shared by the entity extractors. """
+        import _token_cache
+
+        return _token_cache.TokenCache(os.path.join(self.data_path, 'Cache', 'Tokens'))
+
+    def _annual_store(self, country, create=False):
+        """ Return the corpus store for a country's annual legislation, or None if it still uses JSON files. """
+        from _corpus_store import CorpusStore
+
+        if country not in self._stores:
+            store_dir = os.path.join(self.data_path, 'Legislation', country, 'Annual.store')
+
+            if os.path.isdir(store_dir) or create:
+                self._stores[country] = CorpusStore(store_dir)
+            else:
+                return None
+
+        return self._stores[country]
+
+    def _annual_keys(self, country):
+        store = self._annual_store(country)
+
+        if store is None:
+            country_dir = os.path.join(self.data_path, 'Legislation', country, 'Annual')
+            return [f[:-len('.json')] for f in os.listdir(country_dir) if f.endswith('.json')]
+        else:
+            return store.keys()
+
+    def _iter_annual(self, country, keys=None):
+        """ Stream (key, content) pairs for a country's annual legislation, from the corpus store or JSON files. """
+
+        store = self._annual_store(country)
+
+        if store is None:
+            country_dir = os.path.join(self.data_path, 'Legislation', country, 'Annual')
+
+            for key in keys if keys is not None else self._annual_keys(country):
+                with open(os.path.join(country_dir, key + '.json'), 'rb') as f:
+                    content = json.loads(f.read())
+
+                yield key, content
+
+        else:
+            for key, content in store.iter_records(keys):
+                yield key, content
+
+    def _write_annual(self, country, key, content):
+        store = self._annual_store(country)
+
+        if store is None:
+            out_path = os.path.join(self.data_path, 'Legislation', country, 'Annual', key + '.json')
+
+            # written to a temporary file and renamed into place, so an interrupted write never truncates a document
+            with open(out_path + '.tmp', 'wb') as f:
+                f.write(json.dumps(content))
+
+            os.rename(out_path + '.tmp', out_path)
+        else:
+            store.put(key, content)
+
+    def _compact_annual(self, country, min_dead_fraction=1. / 3):
+        """
+        Drop superseded document versions, if they make up at least min_dead_fraction of a country's store. Compaction
+        rewrites the whole store, so it is left until enough has been superseded (a pass that rewrites every document
+        supersedes about half) rather than paid on every run that updates a few documents.
+        """
+
+        store = self._annual_store(country)
+        if store is not None and store.dead_fraction() >= min_dead_fraction:
+            store.compact()
 
     def _initialize_folders(self, country):
         base_country_path = os.path.join(self.data_path, 'Legislation', country.strip('_'))
@@ -323,8 +580,61 @@ class DataManager:
             pass
 
 
+def _parse_document(work_unit):
+    """
+    Parse a single document, for use in DataManager.append_parsed (optionally in a worker process). Returns the key,
+    the updated content (None on failure) and a traceback string (None on success).
+    """
+    import traceback
+    import _country_parsers_annual
+
+    country, full_path, key, content = work_unit
+
+    try:
+        manager = getattr(_country_parsers_annual, country)(full_path, content)
+        manager.parse()
+
+        return key, manager.content, None
+
+    except Exception:
+        return key, None, traceback.format_exc()
+
+
+# extractor used by _extract_entities; one per worker process
+_entity_worker = None
+
+
+def _init_entity_worker(country, extractor_args):
+    """ Build the entity extractor once per process, so the tagger is only loaded once. """
+    import _country_entities
+
+    global _entity_worker
+    _entity_worker = getattr(_country_entities, country)(**extractor_args)
+
+
+def _extract_entities(batch):
+    """
+    Extract entities for a batch of (key, output row, parsed text) documents, returning the completed (key, row) pairs
+    in the same order.
+    """
+
+    results = _entity_worker.do_entity_extraction_batch([parsed_doc for _, _, parsed_doc in batch])
+
+    out = []
+    for (key, row, _), parsed in zip(batch, results):
+        keys_to_add = ['total_nodes', 'total_edges', 'clustering', 'average_degree']
+        null_keys = ['cosponsors', 'hearings', 'referred']
+
+        row.update({k: parsed[k] for k in keys_to_add})
+        row.update({k: len(row[k]) if row[k] else 0 for k in null_keys})
+
+        out.append((key, row))
+
+    return out
+
+
 class Visualize:
-    def __init__(self, wrk_dir, country):
+    def __init__(self, wrk_dir, country, ner_service=None, tagger='lstm'):
         import _country_entities
 
         # some test examples
@@ -332,20 +642,21 @@ class Visualize:
         # file_name = '111th-congress_senate-bill_1707.json'
 
         self.wrk_dir = wrk_dir.rstrip(os.sep)
-        self.parser = getattr(_country_entities, country)()
+        self.parser = getattr(_country_entities, country)(ner_service=ner_service, tagger=tagger)
 
         self.G = None
         self.edges = None
 
     def analyze(self, path, out_path=None):
         import networkx as nx
+        import _graph_metrics
 
         with open(os.path.join(self.wrk_dir, path), 'rb') as f:
             content = json.loads(f.read())
 
         parsed = self.parser.do_entity_extraction(content['parsed'])
 
-        self.G = parsed['graph']
+        self.G = _graph_metrics.result_graph(parsed)
         self.edges = parsed['edges']
 
         eigs = nx.eigenvector_centrality(self.G, weight='weight')
@@ -382,6 +693,102 @@ class Visualize:
         plt.savefig("/home/rbshaffer/Desktop/fig1.pdf", dpi=500)
 
 
+class ResultsWriter(object):
+    def __init__(self, path, fieldnames, writer_class=csv.DictWriter, flush_every=100, append=False,
+                 checkpoint_path=None):
+        """
+        Streaming CSV writer for extraction results. Holds a single buffered handle open for the whole run, keeps only
+        the output columns of each row, and flushes to disk every flush_every rows.
+
+        :param path: output CSV path; its directory is created if necessary.
+        :param fieldnames: output columns.
+        :param writer_class: csv.DictWriter, or DictUnicodeWriter for unicode rows.
+        :param flush_every: number of rows to buffer between flushes.
+        :param append: append to an existing file rather than starting a new one. The header is only written to an
+                       empty file.
+        :param checkpoint_path: if given, each flush appends the keys of the rows flushed and the size of the output
+                                to this file. When appending, the output is first cut back to the last checkpointed
+                                size, and the checkpointed keys are available as self.done.
+        """
+
+        out_dir = os.path.dirname(path)
+        if out_dir and not os.path.isdir(out_dir):
+            os.makedirs(out_dir)
+
+        self.fieldnames = fieldnames
+        self.flush_every = flush_every
+        self.pending = 0
+
+        self.checkpoint_path = checkpoint_path
+        self.done = set()
+        self._pending_keys = []
+
+        if checkpoint_path is not None:
+            if append:
+                self._resume(path)
+            elif os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+
+        self.f = open(path, 'ab' if append else 'wb', 1024 * 1024)
+        self.writer = writer_class(self.f, fieldnames=fieldnames, extrasaction='ignore')
+
+        if self.f.tell() == 0:
+            self.writer.writeheader()
+
+        if checkpoint_path is not None:
+            self.flush()
+
+    def writerow(self, row, key=None):
+        self.writer.writerow({k: row.get(k) for k in self.fieldnames})
+
+        if key is not None:
+            self._pending_keys.append(key)
+
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        self.f.flush()
+        self.pending = 0
+
+        if self.checkpoint_path is not None:
+            # the checkpoint is only written once the rows it covers are on disk
+            with open(self.checkpoint_path, 'ab') as f:
+                f.write(json.dumps({'offset': self.f.tell(), 'ids': self._pending_keys}) + '\n')
+
+            self.done.update(self._pending_keys)
+            self._pending_keys = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def _resume(self, path):
+        offset = None
+
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'rb') as f:
+                for line in f:
+                    # a crash mid-append can leave a partial last line, which is simply dropped
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    offset = record['offset']
+                    self.done.update(record['ids'])
+
+        # rows written after the last checkpoint are dropped, and redone by the resumed run
+        if offset is not None and os.path.exists(path):
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+
 class DictUnicodeWriter(object):
     def __init__(self, f, fieldnames, dialect=csv.excel, encoding="utf-8", **kwds):
         # Redirect output to a queue
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import _country_scrapers_annual
+
+
+FULL_DOCUMENT = 'Click here for the entire document'
+
+# first pages of parl.gc.ca publications, cut down to the parts around their links
+PAGES = [
+    '<html><body><a href="/HousePublications/Publication.aspx?DocId=1&amp;Language=E&amp;Mode=1&amp;File=4">'
+    'Click here for the entire document</a> <a href="/x">Next Page</a></body></html>',
+
+    '<p><a class="link" title="a>b" href=\'/Publication.aspx?a=1&amp;b=2\'><b>Click here for the entire document</b>'
+    ' (PDF)</a></p>',
+
+    '<script>var s = "<a href=\'/fake\'>Click here for the entire document</a>";</script>'
+    '<!-- <a href="/commented">Click here for the entire document</a> -->'
+    '<a href=/real?x=1>Click here for the entire document</a>',
+
+    '<a href="/one">Click here for the entire document</a><A HREF="/two">Click here for the entire document</A>',
+
+    '<a href="/n">Next Page</a>',
+
+    u'<meta charset="utf-8"><a href="/caf\xe9?a=1&amp;b">Click here for the entire document</a>'.encode('utf8'),
+]
+
+
+class LinkScanTest(unittest.TestCase):
+    def test_matches_parsed_tree(self):
+        for html in PAGES:
+            expected = [tag['href'] for tag in BeautifulSoup(html, 'lxml').find_all('a') if FULL_DOCUMENT in tag.text]
+
+            self.assertEqual(_country_scrapers_annual._labelled_links(html, FULL_DOCUMENT), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _comention
+
+
+# entities tagged in each section of a few enacted bills
+SAMPLE_BILLS = [
+    # single section, no co-mentions
+    [['Secretary of Energy']],
+
+    [[],
+     ['Secretary of Homeland Security', 'Federal Emergency Management Agency', 'Secretary of Homeland Security'],
+     ['Federal Emergency Management Agency', 'Comptroller General', 'Congress', 'Congress', 'Congress'],
+     ['Comptroller General', 'Secretary of Homeland Security'],
+     ['Congress']],
+
+    [['Department of Veterans Affairs', 'Secretary of Veterans Affairs', 'Secretary of Veterans Affairs',
+      'Veterans Health Administration'],
+     ['Secretary of Veterans Affairs', 'Department of Veterans Affairs', 'Department of Veterans Affairs',
+      'Department of Veterans Affairs', 'Veterans Health Administration', 'Congress'],
+     ['Veterans Health Administration', 'Department of Veterans Affairs'],
+     ['Congress', 'Secretary of Defense', 'Secretary of Veterans Affairs', 'Secretary of Defense']],
+
+    [['Internal Revenue Service', 'Secretary of the Treasury'],
+     ['Secretary of the Treasury', 'Internal Revenue Service'],
+     ['Internal Revenue Service', 'Internal Revenue Service', 'Social Security Administration'],
+     ['Social Security Administration', 'Secretary of the Treasury', 'Internal Revenue Service',
+      'Commissioner of Social Security', 'Commissioner of Social Security']],
+]
+
+
+def legacy_edge_weights(entity_chunks):
+    """ Co-mention edges as computed by do_entity_extraction before _comention. """
+
+    edges = {}
+    for chunk in entity_chunks:
+        if len(set(chunk)) > 1:
+            entities = list(set(chunk))
+            for i in range(len(entities)):
+                for j in range(i+1, len(entities)):
+                    e1 = entities[i]
+                    e2 = entities[j]
+
+                    if (e1, e2) in edges:
+                        edges[(e1, e2)] += min(chunk.count(e1), chunk.count(e2))
+                    elif (e2, e1) in edges:
+                        edges[(e2, e1)] += min(chunk.count(e1), chunk.count(e2))
+                    else:
+                        edges[(e1, e2)] = min(chunk.count(e1), chunk.count(e2))
+
+    return edges
+
+
+class EdgeWeightsTest(unittest.TestCase):
+    def test_matches_legacy(self):
+        for bill in SAMPLE_BILLS:
+            self.assertEqual(_comention.edge_weights(bill), legacy_edge_weights(bill))
+
+    def test_batch_matches(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        # same weights and the same orientation of each pair, for the whole batch at once
+        self.assertEqual(_comention.batch_edge_weights(SAMPLE_BILLS),
+                         [_comention.edge_weights(bill) for bill in SAMPLE_BILLS])
+
+    def test_entity_counts(self):
+        for bill in SAMPLE_BILLS:
+            all_entities = [e for chunk in bill for e in chunk]
+
+            self.assertEqual(dict(_comention.count_entities(bill)),
+                             {e: all_entities.count(e) for e in set(all_entities)})
+
+
+if __name__ == '__main__':
+    unittest.main()
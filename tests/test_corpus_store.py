@@ -0,0 +1,91 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _corpus_store import CorpusStore
+
+
+class CompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.tmp_dir, 'Annual.store')
+
+        store = CorpusStore(self.store_dir)
+        for i in range(3):
+            store.put(u'doc{0}'.format(i), {'version': 1})
+        store.put(u'doc0', {'version': 2})
+        store.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertLatest(self, store):
+        self.assertEqual(dict(store.iter_records()),
+                         {u'doc0': {'version': 2}, u'doc1': {'version': 1}, u'doc2': {'version': 1}})
+
+    def test_compact(self):
+        store = CorpusStore(self.store_dir)
+        store.compact()
+
+        self.assertLatest(store)
+        self.assertLatest(CorpusStore(self.store_dir))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['Annual.store'])
+
+    def test_byte_counts(self):
+        store = CorpusStore(self.store_dir)
+        self.assertGreater(store.dead_bytes, 0)
+
+        reopened_fraction = store.dead_fraction()
+        store.put(u'doc1', {'version': 2})
+        self.assertGreater(store.dead_fraction(), reopened_fraction)
+
+        store.close()
+        self.assertEqual(CorpusStore(self.store_dir).dead_fraction(), store.dead_fraction())
+
+        store.compact()
+        self.assertEqual(store.dead_fraction(), 0.)
+        self.assertEqual(CorpusStore(self.store_dir).dead_fraction(), 0.)
+
+    def test_stale_compact_dir_ignored(self):
+        stale = CorpusStore(self.store_dir + '.compact')
+        stale.put(u'doc0', {'version': 0})
+        stale.put(u'gone', {'version': 0})
+        stale.close()
+
+        store = CorpusStore(self.store_dir)
+        self.assertFalse(os.path.exists(self.store_dir + '.compact'))
+
+        stale = CorpusStore(self.store_dir + '.compact')
+        stale.put(u'gone', {'version': 0})
+        stale.close()
+
+        store.compact()
+        self.assertLatest(CorpusStore(self.store_dir))
+
+    def test_crash_between_renames(self):
+        # the new store is complete, the old one moved aside, and the new one not yet moved into place
+        store = CorpusStore(self.store_dir)
+        compacted = CorpusStore(self.store_dir + '.compact')
+        for id_val, content in store.iter_records():
+            compacted.put(id_val, content)
+        compacted.close()
+        store.close()
+
+        os.rename(self.store_dir, self.store_dir + '.old')
+
+        self.assertLatest(CorpusStore(self.store_dir))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['Annual.store'])
+
+    def test_crash_after_moving_old_store(self):
+        os.rename(self.store_dir, self.store_dir + '.old')
+
+        self.assertLatest(CorpusStore(self.store_dir))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['Annual.store'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _download_log import IdRegistry, IdSet
+
+
+class IdSetTest(unittest.TestCase):
+    def assertIndexed(self, ids, expected):
+        self.assertEqual(list(ids), expected)
+        self.assertEqual(ids._index, set(expected))
+
+    def test_list_operations_keep_index(self):
+        ids = IdSet(['a', 'b', 'a', 'c'])
+        self.assertIndexed(ids, ['a', 'b', 'c'])
+
+        ids.insert(0, 'd')
+        ids.insert(1, 'a')
+        self.assertIndexed(ids, ['d', 'a', 'b', 'c'])
+
+        ids += ['e', 'b']
+        self.assertIndexed(ids, ['d', 'a', 'b', 'c', 'e'])
+
+        self.assertEqual(ids.pop(), 'e')
+        self.assertEqual(ids.pop(0), 'd')
+        self.assertIndexed(ids, ['a', 'b', 'c'])
+
+        ids[0] = 'x'
+        self.assertIndexed(ids, ['x', 'b', 'c'])
+
+        ids[1:2] = ['y', 'c', 'z']
+        self.assertIndexed(ids, ['x', 'y', 'c', 'z'])
+
+        ids[::2] = ['p', 'q']
+        self.assertIndexed(ids, ['p', 'y', 'q', 'z'])
+
+        del ids[0]
+        del ids[1:]
+        self.assertIndexed(ids, ['y'])
+
+        ids *= 3
+        self.assertIndexed(ids, ['y'])
+
+        ids.remove('y')
+        self.assertIndexed(ids, [])
+        self.assertNotIn('y', ids)
+
+    def test_registry_serializes_as_list(self):
+        log_data = {'Annual': {'UnitedStates': ['1', '2']}}
+
+        ids = IdRegistry(log_data).namespace('Annual', 'UnitedStates')
+        ids.append('3')
+
+        self.assertIs(IdRegistry(log_data).namespace('Annual', 'UnitedStates'), ids)
+        self.assertEqual(json.loads(json.dumps(log_data)), {'Annual': {'UnitedStates': ['1', '2', '3']}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import glob
+import os
+import sys
+import unittest
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _country_scrapers_annual import UnitedStates
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'congress_gov')
+
+
+def _pages(kind):
+    for path in sorted(glob.glob(os.path.join(FIXTURES, kind + '-*.html'))):
+        with open(path, 'rb') as f:
+            yield path, f.read()
+
+
+def _parse(function, html):
+    # pages the scraper cannot handle should fail the same way with either parser
+    try:
+        return function(html)
+    except Exception as e:
+        return 'error: ' + type(e).__name__
+
+
+class PageParserTest(unittest.TestCase):
+    """ The restricted congress.gov parsers against the original full-tree parsing, on saved pages. """
+
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def test_meta_pages(self):
+        for path, html in _pages('all-info'):
+            self.assertEqual(_parse(UnitedStates.parse_meta_page, html),
+                             _parse(UnitedStates.parse_meta_page_legacy, html), path)
+
+    def test_text_pages(self):
+        for path, html in _pages('text'):
+            self.assertEqual(UnitedStates.parse_text_page(html), UnitedStates.parse_text_page_legacy(html), path)
+
+    def test_scripts_and_comments_ignored(self):
+        # every saved all-info page has a script holding a member link and a policy area label, and a commented-out
+        # committee table
+        for path, html in _pages('all-info'):
+            meta = _parse(UnitedStates.parse_meta_page, html)
+            if isinstance(meta, dict):
+                self.assertNotIn('fake', meta['policy_area'] or '', path)
+                self.assertNotIn(u'Next', meta['cosponsors'], path)
+                self.assertNotIn(u'Fake', meta['referred'], path)
+
+
+if __name__ == '__main__':
+    unittest.main()
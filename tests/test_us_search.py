@@ -0,0 +1,86 @@
+import BaseHTTPServer
+import json
+import os
+import sys
+import threading
+import types
+import unittest
+import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _http
+from _country_scrapers_annual import UnitedStates
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'congress_gov_search')
+
+
+class _SearchHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Serves the saved result pages for any search; pages past the last saved one are empty. """
+
+    def do_GET(self):
+        query = urlparse.parse_qs(urlparse.urlparse(self.path).query)
+        self.server.requests.append((json.loads(query['query'][0])['congresses'], int(query['page'][0]),
+                                     int(query['pageSize'][0])))
+
+        page = min(int(query['page'][0]), 3)
+        with open(os.path.join(FIXTURES, 'results-page-{0}.html'.format(page)), 'rb') as f:
+            body = f.read()
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SearchIdsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _SearchHandler)
+        self.server.requests = []
+
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        _http.set_rate_limit(None)
+        _http.configure_cache(None)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        _http.set_rate_limit(2.)
+
+    def _scraper(self, workers):
+        # built without running ID discovery against congress.gov
+        scraper = types.InstanceType(UnitedStates)
+        scraper.workers = workers
+        scraper.client = _http.HttpClient()
+        scraper.search_base = 'http://127.0.0.1:{0}/advanced-search/legislation?query='.format(self.server.server_port)
+
+        return scraper
+
+    def test_search_ids(self):
+        expected = ['115th-congress_house-bill_1', '115th-congress_senate-bill_84',
+                    '115th-congress_house-joint-resolution_38', '115th-congress_house-bill_244',
+                    '115th-congress_senate-bill_117', '115th-congress_house-bill_72',
+                    '115th-congress_senate-joint-resolution_34']
+
+        for workers, pages in [(1, [1, 2, 3]), (2, [1, 2, 3, 4])]:
+            del self.server.requests[:]
+
+            scraper = self._scraper(workers)
+            self.assertEqual(scraper._search_ids(scraper._search_url(115)), expected)
+
+            # pages are requested until the first empty one, in waves of one page per worker
+            self.assertEqual(sorted(page for _, page, _ in self.server.requests), pages)
+            self.assertTrue(all(congresses == ['115'] and size == UnitedStates.page_size
+                                for congresses, _, size in self.server.requests))
+
+
+if __name__ == '__main__':
+    unittest.main()